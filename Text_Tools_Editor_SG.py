@@ -1,3 +1,5 @@
+from .Text_Tools_Text_Store_SG import text_blobs, ui_text
+
 class TextToolsEditorSG:
     CATEGORY = "text/utils"
 
@@ -33,13 +35,16 @@ class TextToolsEditorSG:
             display_text = text_input
         else:
             # Otherwise, keep showing the text from the editor
-            display_text = text
+            # (large texts may be stored out of the workflow, the widget then holds a reference)
+            try:
+                display_text = text_blobs.resolve(text)
+            except (OSError, ValueError) as e:
+                display_text = f"Error loading stored text: {str(e)}"
 
         # Return both tuple for output AND dict for UI message
         return {
-            "ui": {
-                "text": [display_text]
-            },
+            # Large texts only send a preview, the rest is paged in from the text store
+            "ui": ui_text(display_text),
             "result": (display_text,)
         }
 
@@ -0,0 +1,1073 @@
+import os
+import io
+import sys
+import json
+import time
+import select
+import ctypes
+import ctypes.util
+import hashlib
+import functools
+import gzip
+import lzma
+import bz2
+import re
+import mmap
+import struct
+import threading
+import glob
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from server import PromptServer
+
+# Plain text formats the loaders understand
+TEXT_EXTENSIONS = ('.txt', '.json', '.jsonl', '.md')
+
+# Compression suffix -> (Save Text File option name, module)
+COMPRESSION_CODECS = {
+    '.gz': ("gzip", gzip),
+    '.xz': ("xz", lzma),
+    '.bz2': ("bz2", bz2),
+}
+
+COMPRESSION_SUFFIXES = {name: suffix for suffix, (name, _) in COMPRESSION_CODECS.items()}
+
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + tuple(
+    ext + suffix for ext in TEXT_EXTENSIONS for suffix in COMPRESSION_CODECS
+)
+
+# Partial read modes offered by the loaders ("full" reads the whole file)
+READ_MODES = ["full", "byte_range", "last_kb", "last_lines", "follow", "line"]
+
+UNSUPPORTED_TYPE_MESSAGE = "Invalid file type. Only .txt, .json, .jsonl and .md files (optionally .gz, .xz or .bz2 compressed) are supported"
+
+
+def split_compression(path):
+    """
+    Split a path into (path without compression suffix, compression suffix or "")
+    """
+    root, suffix = os.path.splitext(path)
+    if suffix.lower() in COMPRESSION_CODECS:
+        return root, suffix.lower()
+    return path, ""
+
+
+def base_extension(path):
+    """
+    Return the text extension of a path, ignoring any compression suffix (e.g. ".json" for "a.json.gz")
+    """
+    return os.path.splitext(split_compression(path)[0])[1].lower()
+
+
+def is_supported_file(path):
+    """
+    Check whether a file name is a (possibly compressed) text, JSON, or Markdown file
+    """
+    return path.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def open_text_file(path):
+    """
+    Open a text file for reading, decompressing .gz/.xz/.bz2 files as a stream
+    """
+    suffix = split_compression(path)[1]
+    if suffix:
+        return COMPRESSION_CODECS[suffix][1].open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def read_text_file(path):
+    """
+    Read the full decoded content of a (possibly compressed) text file
+    """
+    with open_text_file(path) as f:
+        return f.read()
+
+
+def open_compressed_writer(raw, compression, level):
+    """
+    Wrap a binary file object in a streaming compressor for the given option name
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=level)
+    if compression == "xz":
+        return lzma.LZMAFile(raw, 'wb', preset=level)
+    if compression == "bz2":
+        return bz2.BZ2File(raw, 'wb', compresslevel=level)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def write_text_file(full_path, content, fsync=False, compression="none", compression_level=6):
+    """
+    Write content to full_path, optionally compressed and forced to disk before returning
+    """
+    with open(full_path, 'wb') as raw:
+        if compression == "none":
+            stream = io.TextIOWrapper(raw, encoding='utf-8')
+        else:
+            stream = io.TextIOWrapper(open_compressed_writer(raw, compression, compression_level),
+                                      encoding='utf-8')
+        stream.write(content)
+        stream.flush()
+        if compression == "none":
+            stream.detach()
+        else:
+            # Closing the compressor writes its trailer but leaves raw open
+            stream.close()
+        if fsync:
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+_JSON_TOKEN = re.compile(r'''[ \t\n\r]*(?:
+    (?P<str>"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*")
+    |(?P<lit>true|false|null|NaN|Infinity|-Infinity)
+    |(?P<num>-?(?:0|[1-9][0-9]*)(?P<fraction>(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?))
+    |(?P<punct>[{}\[\]:,])
+)''', re.VERBOSE)
+_TRAILING_WHITESPACE = re.compile(r'[ \t\n\r]*\Z')
+
+# Parser states for reindent_json
+_VALUE, _VALUE_OR_CLOSE, _KEY, _KEY_OR_CLOSE, _COLON, _COMMA_OR_CLOSE, _END = range(7)
+
+
+def reindent_json(text, indent=2):
+    """
+    Re-indent JSON text token by token without building Python objects.
+    The result matches json.dumps(json.loads(text), indent=indent, ensure_ascii=False)
+    (except that duplicate keys are kept). Returns None if text isn't valid JSON.
+    """
+    chunks = []
+    out = []
+    append = out.append
+    match_token = _JSON_TOKEN.match
+    newlines = ["\n"]
+    stack = []  # True for an object, False for an array
+    expect = _VALUE
+    pos = 0
+
+    def newline(depth):
+        while len(newlines) <= depth:
+            newlines.append("\n" + " " * (indent * len(newlines)))
+        return newlines[depth]
+
+    while True:
+        match = match_token(text, pos)
+        if match is None:
+            break
+        pos = match.end()
+        kind = match.lastgroup
+        if len(out) >= 8192:
+            # Join small pieces as we go so memory stays close to the output size
+            chunks.append("".join(out))
+            out.clear()
+        if kind == "punct":
+            char = match.group("punct")
+            if char == ",":
+                if expect != _COMMA_OR_CLOSE:
+                    return None
+                append(",")
+                append(newline(len(stack)))
+                expect = _KEY if stack[-1] else _VALUE
+            elif char == ":":
+                if expect != _COLON:
+                    return None
+                append(": ")
+                expect = _VALUE
+            elif char == "}" or char == "]":
+                is_object = char == "}"
+                if expect == (_KEY_OR_CLOSE if is_object else _VALUE_OR_CLOSE):
+                    append(char)
+                elif expect == _COMMA_OR_CLOSE and stack[-1] == is_object:
+                    append(newline(len(stack) - 1))
+                    append(char)
+                else:
+                    return None
+                stack.pop()
+                expect = _COMMA_OR_CLOSE if stack else _END
+            else:
+                if expect == _VALUE_OR_CLOSE:
+                    append(newline(len(stack)))
+                elif expect != _VALUE:
+                    return None
+                append(char)
+                is_object = char == "{"
+                stack.append(is_object)
+                expect = _KEY_OR_CLOSE if is_object else _VALUE_OR_CLOSE
+            continue
+
+        if expect == _VALUE_OR_CLOSE or expect == _KEY_OR_CLOSE:
+            append(newline(len(stack)))
+        elif expect != _VALUE and not (expect == _KEY and kind == "str"):
+            return None
+
+        token = match.group(kind)
+        if kind == "str":
+            if "\\" in token:
+                # Escapes are normalised the way json.dumps writes them
+                token = json.dumps(json.loads(token), ensure_ascii=False)
+            if expect == _KEY or expect == _KEY_OR_CLOSE:
+                append(token)
+                expect = _COLON
+                continue
+        elif kind == "num":
+            if match.group("fraction"):
+                token = json.dumps(float(token))
+            elif token == "-0":
+                token = "0"
+        append(token)
+        expect = _COMMA_OR_CLOSE if stack else _END
+
+    if expect != _END or _TRAILING_WHITESPACE.match(text, pos) is None:
+        return None
+    chunks.append("".join(out))
+    return "".join(chunks)
+
+
+# Below this size the json round trip is used: it's ~2.4x faster than reindent_json,
+# but needs ~12x the input in extra memory against ~2.5x (~210 MB vs ~40 MB at 16 MB,
+# 1.25 GB vs 260 MB at 100 MB; see benchmarks/json_reindent_benchmark.py)
+STREAMING_JSON_MIN_CHARS = 16 << 20
+
+
+def pretty_json_text(content):
+    """
+    Re-indent JSON text with 2 spaces, returning it unchanged if it isn't valid JSON
+    """
+    if len(content) < STREAMING_JSON_MIN_CHARS:
+        try:
+            return json.dumps(json.loads(content), indent=2, ensure_ascii=False)
+        except json.JSONDecodeError:
+            return content
+    result = reindent_json(content)
+    return content if result is None else result
+
+
+class TextContentCache:
+    """
+    Process-wide LRU cache of loaded (decoded and pretty-printed) file content.
+    Entries are keyed on the path and validated against its stat identity, and
+    the cache is bounded by a total character budget.
+    """
+
+    def __init__(self, max_chars=256 * 1024 * 1024):
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_chars = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, identity):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == identity:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                # File changed since it was cached
+                self._drop(path)
+            self.misses += 1
+            return None
+
+    def put(self, path, identity, content, size=None):
+        # size defaults to len(content); pass it for entries that aren't strings
+        if size is None:
+            size = len(content)
+        if size > self.max_chars:
+            return
+        with self._lock:
+            if path in self._entries:
+                self._drop(path)
+            self._entries[path] = (identity, content, size)
+            self._total_chars += size
+            while self._total_chars > self.max_chars:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, path):
+        _, _, size = self._entries.pop(path)
+        self._total_chars -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_chars = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "chars": self._total_chars,
+                "max_chars": self.max_chars,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+content_cache = TextContentCache()
+
+# Memory of a parsed JSON document relative to its source length: about 1.5x for long strings,
+# 4.5x for typical records and 8x for compact arrays of small numbers or short strings
+JSON_DOCUMENT_MEMORY_FACTOR = 8
+# Parsed JSON documents for json_path extraction; each entry is charged its estimated
+# memory (source length * JSON_DOCUMENT_MEMORY_FACTOR), so this is roughly a 256 MB budget
+json_document_cache = TextContentCache(max_chars=256 * 1024 * 1024)
+
+
+def stat_identity(st):
+    """
+    Identity of a file version, used to tell when cached data is stale
+    """
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class StatSnapshots:
+    """
+    One os.stat per path per prompt, shared by VALIDATE_INPUTS, IS_CHANGED and
+    load_file. All snapshots are dropped when the prompt id changes.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._generation = None
+        self._stats = {}
+
+    def stat(self, path):
+        """
+        Return the os.stat_result for path (None if it doesn't exist)
+        """
+        path = os.path.abspath(path)
+        generation = getattr(PromptServer.instance, "last_prompt_id", None)
+        with self._lock:
+            if generation != self._generation or len(self._stats) >= self.max_entries:
+                self._generation = generation
+                self._stats = {}
+            if path in self._stats:
+                return self._stats[path]
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        # Missing files aren't remembered, they may be written later in the same prompt
+        if st is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._stats[path] = st
+        return st
+
+
+stat_snapshots = StatSnapshots()
+
+# abspath -> (stat identity, digest)
+_digests = OrderedDict()
+_digest_lock = threading.Lock()
+
+
+def content_digest(path, st=None, max_cached=1024):
+    """
+    blake2b digest of a file's bytes, computed as a stream and cached by stat
+    identity so an unchanged file is never hashed twice
+    """
+    if st is None:
+        st = os.stat(path)
+    path = os.path.abspath(path)
+    identity = stat_identity(st)
+    with _digest_lock:
+        cached = _digests.get(path)
+        if cached is not None and cached[0] == identity:
+            _digests.move_to_end(path)
+            return cached[1]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    result = digest.hexdigest()
+    with _digest_lock:
+        _digests[path] = (identity, result)
+        _digests.move_to_end(path)
+        while len(_digests) > max_cached:
+            _digests.popitem(last=False)
+    return result
+
+
+def load_text_content(path, st=None):
+    """
+    Return the loader output for a file (JSON pretty-printed), served from
+    content_cache while the file's stat identity is unchanged
+    """
+    if st is None:
+        st = os.stat(path)
+    path = os.path.abspath(path)
+    identity = stat_identity(st)
+    content = content_cache.get(path, identity)
+    if content is None:
+        content = read_text_file(path)
+        if base_extension(path) == '.json':
+            content = pretty_json_text(content)
+        content_cache.put(path, identity, content)
+    return content
+
+
+_JSON_PATH_STEP = re.compile(r'''
+    \.?(?P<key>[^.\[\]]+)
+    |\[\s*(?P<index>-?[0-9]+)\s*\]
+    |\[\s*(?:"(?P<dq>(?:[^"\\]|\\.)*)"|'(?P<sq>(?:[^'\\]|\\.)*)')\s*\]
+''', re.VERBOSE)
+
+
+@functools.lru_cache(maxsize=256)
+def parse_json_path(json_path):
+    """
+    Split a key path like metadata.prompt, captions[17].text or ["a.b"][-1]
+    into a tuple of keys (str) and list indices (int). A leading $ is ignored.
+    """
+    json_path = json_path.strip()
+    if json_path.startswith("$"):
+        json_path = json_path[1:]
+    steps = []
+    pos = 0
+    while pos < len(json_path):
+        match = _JSON_PATH_STEP.match(json_path, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Invalid JSON path at position {pos}: {json_path}")
+        pos = match.end()
+        if match.group("key") is not None:
+            steps.append(match.group("key").strip())
+        elif match.group("index") is not None:
+            steps.append(int(match.group("index")))
+        else:
+            quoted = match.group("dq") if match.group("dq") is not None else match.group("sq")
+            steps.append(re.sub(r"\\(.)", r"\1", quoted))
+    return tuple(steps)
+
+
+def select_json_path(document, steps):
+    """
+    Walk a parsed JSON document along the steps from parse_json_path
+    """
+    value = document
+    for depth, step in enumerate(steps):
+        if isinstance(value, list):
+            if isinstance(step, str) and step.lstrip("-").isdigit():
+                step = int(step)
+            if not isinstance(step, int) or not -len(value) <= step < len(value):
+                raise ValueError(f"JSON path: no index {step!r} at {format_json_path(steps[:depth])}")
+        elif isinstance(value, dict):
+            step = str(step)
+            if step not in value:
+                raise ValueError(f"JSON path: no key {step!r} at {format_json_path(steps[:depth])}")
+        else:
+            raise ValueError(f"JSON path: {format_json_path(steps[:depth])} is not an object or array")
+        value = value[step]
+    return value
+
+
+def format_json_path(steps):
+    return "$" + "".join(f"[{step}]" if isinstance(step, int) else f".{step}" for step in steps)
+
+
+def format_json_value(value, json_output="text"):
+    """
+    text: strings as they are, anything else pretty-printed. compact_json: minified JSON.
+    """
+    if json_output == "compact_json":
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def load_json_document(path, st=None):
+    """
+    Parse a JSON file, served from json_document_cache while its stat identity is unchanged
+    """
+    if st is None:
+        st = os.stat(path)
+    path = os.path.abspath(path)
+    identity = stat_identity(st)
+    document = json_document_cache.get(path, identity)
+    if document is None:
+        text = read_text_file(path)
+        document = json.loads(text)
+        json_document_cache.put(path, identity, document, size=len(text) * JSON_DOCUMENT_MEMORY_FACTOR)
+    return document
+
+
+def select_json_text(document, json_path, json_output="text"):
+    """
+    Return (text, items) for the value at json_path. items holds one string per
+    element when the value is an array, otherwise just the text.
+    """
+    value = select_json_path(document, parse_json_path(json_path))
+    text = format_json_value(value, json_output)
+    if isinstance(value, list):
+        return text, [format_json_value(item, json_output) for item in value]
+    return text, [text]
+
+
+def _open_binary(path):
+    suffix = split_compression(path)[1]
+    if suffix:
+        return COMPRESSION_CODECS[suffix][1].open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _decode_slice(data):
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+
+def _char_boundary(buf, pos, size):
+    # Move pos back to the first byte of the UTF-8 character it falls in
+    while 0 < pos < size and buf[pos] & 0xC0 == 0x80:
+        pos -= 1
+    return pos
+
+
+def read_byte_range(path, start, end=0):
+    """
+    Read bytes [start, end) of a file as text (end 0 = end of file).
+    Plain files are memory-mapped so only the slice is copied.
+    """
+    start = max(0, start)
+    if split_compression(path)[1]:
+        # Compressed files can't be mapped, seek through the decompressed stream instead
+        with _open_binary(path) as f:
+            f.seek(start)
+            data = f.read() if end <= 0 else f.read(max(0, end - start))
+        return _decode_slice(data)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if end <= 0 or end > size:
+            end = size
+        if start >= end:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = _char_boundary(mm, start, size)
+            end = _char_boundary(mm, end, size)
+            return _decode_slice(mm[start:end])
+
+
+def read_tail_bytes(path, nbytes):
+    """
+    Read roughly the last nbytes of a file as text
+    """
+    if split_compression(path)[1]:
+        # Keep a sliding window while streaming, so memory stays around nbytes
+        tail = bytearray()
+        with _open_binary(path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                tail += chunk
+                if len(tail) > nbytes:
+                    del tail[:len(tail) - nbytes]
+        return _decode_slice(bytes(tail))
+    size = os.path.getsize(path)
+    return read_byte_range(path, size - nbytes, size)
+
+
+def read_tail_lines(path, nlines):
+    """
+    Read the last nlines lines of a file as text
+    """
+    if nlines <= 0:
+        return ""
+    if split_compression(path)[1]:
+        with _open_binary(path) as f:
+            return _decode_slice(b"".join(deque(f, maxlen=nlines)))
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # A trailing newline ends the last line rather than starting a new one
+            pos = size - 1 if mm[size - 1] == 0x0A else size
+            for _ in range(nlines):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos == -1:
+                    break
+            return _decode_slice(mm[pos + 1:size])
+
+
+# (abspath, node id) -> (inode, byte offset already returned)
+_follow_offsets = {}
+_follow_lock = threading.Lock()
+
+
+def read_follow(path, follow_key=None, first_read_bytes=64 * 1024):
+    """
+    Return only the text appended to a file since the previous call with the same key.
+    The first call returns the last first_read_bytes; a truncated or replaced file is
+    read again from the start.
+    """
+    if split_compression(path)[1]:
+        raise ValueError("follow mode needs an uncompressed file")
+    key = (os.path.abspath(path), follow_key)
+    st = os.stat(path)
+    with _follow_lock:
+        state = _follow_offsets.get(key)
+        if state is None:
+            start = max(0, st.st_size - first_read_bytes)
+        elif state[0] != st.st_ino or state[1] > st.st_size:
+            start = 0
+        else:
+            start = state[1]
+        _follow_offsets[key] = (st.st_ino, st.st_size)
+    return read_byte_range(path, start, st.st_size)
+
+
+class LineIndex:
+    """
+    Byte offset of the start of every line in a file, stored in a compact
+    array('Q') so any line can be sliced out with one seek. The index is
+    persisted next to the file as <file>.lineidx and rebuilt when the file's
+    size or mtime changes.
+    """
+
+    MAGIC = b"SGLX1\0\0\0"
+    HEADER = struct.Struct("<8sQQ")
+
+    def __init__(self, offsets, size, mtime_ns):
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def line_span(self, index):
+        """
+        Return the (start, end) byte span of line `index`, excluding its newline
+        """
+        start = self.offsets[index]
+        end = self.offsets[index + 1] - 1 if index + 1 < len(self.offsets) else self.size
+        return start, end
+
+    @classmethod
+    def build(cls, path, st):
+        offsets = array('Q')
+        if st.st_size > 0:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets.append(0)
+                offsets.extend(m.end() for m in re.finditer(b"\n", mm))
+            # A trailing newline ends the last line rather than starting a new one
+            if offsets[-1] == st.st_size:
+                offsets.pop()
+        return cls(offsets, st.st_size, st.st_mtime_ns)
+
+    @classmethod
+    def load_sidecar(cls, sidecar_path, st):
+        try:
+            with open(sidecar_path, 'rb') as f:
+                magic, size, mtime_ns = cls.HEADER.unpack(f.read(cls.HEADER.size))
+                if magic != cls.MAGIC or size != st.st_size or mtime_ns != st.st_mtime_ns:
+                    return None
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+                return cls(offsets, size, mtime_ns)
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def save_sidecar(self, sidecar_path):
+        try:
+            with open(sidecar_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.size, self.mtime_ns))
+                f.write(self.offsets.tobytes())
+        except OSError:
+            # Read-only folder, the in-memory index still works
+            pass
+
+
+_line_indexes = OrderedDict()
+_line_index_lock = threading.Lock()
+
+
+def get_line_index(path, st=None, max_cached=16):
+    """
+    Return an up-to-date LineIndex for path, from memory, the sidecar file, or a fresh scan
+    """
+    if split_compression(path)[1]:
+        raise ValueError("line mode needs an uncompressed file")
+    path = os.path.abspath(path)
+    if st is None:
+        st = os.stat(path)
+    with _line_index_lock:
+        index = _line_indexes.get(path)
+        if index is not None and index.size == st.st_size and index.mtime_ns == st.st_mtime_ns:
+            _line_indexes.move_to_end(path)
+            return index
+    sidecar_path = path + ".lineidx"
+    index = LineIndex.load_sidecar(sidecar_path, st)
+    if index is None:
+        index = LineIndex.build(path, st)
+        index.save_sidecar(sidecar_path)
+    with _line_index_lock:
+        _line_indexes[path] = index
+        while len(_line_indexes) > max_cached:
+            _line_indexes.popitem(last=False)
+    return index
+
+
+# (abspath, node id) -> (line_index input value, next line to return)
+_line_positions = {}
+
+
+def read_lines(path, line_index=0, line_count=1, auto_increment=False, node_key=None):
+    """
+    Return `line_count` lines starting at `line_index` (0 = first line).
+    With auto_increment each call continues where the previous one for the
+    same node stopped, wrapping around at the end of the file.
+    """
+    st = os.stat(path)
+    index = get_line_index(path, st)
+    total = len(index)
+    if total == 0:
+        return ""
+    start = line_index
+    if auto_increment:
+        key = (os.path.abspath(path), node_key)
+        with _line_index_lock:
+            state = _line_positions.get(key)
+            # Changing the line_index widget restarts the sequence from there
+            if state is not None and state[0] == line_index:
+                start = state[1]
+            _line_positions[key] = (line_index, (start + line_count) % total)
+    start %= total
+    last = min(start + max(1, line_count), total) - 1
+    with open(path, 'rb') as f:
+        f.seek(index.offsets[start])
+        data = f.read(index.line_span(last)[1] - index.offsets[start])
+    if data.endswith(b"\n"):
+        # Last line of a file that ends with a newline
+        data = data[:-1]
+    return _decode_slice(data).rstrip('\r')
+
+
+# Optional loader inputs for the partial READ_MODES and change detection
+LOADER_OPTIONAL_INPUTS = {
+    "read_mode": (READ_MODES, {
+        "default": "full",
+        "tooltip": "full: whole file. byte_range: range_start..range_end. last_kb / last_lines: tail of the file. follow: only what was appended since the last run. line: line_count lines from line_index"
+    }),
+    "range_start": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "tooltip": "byte_range: first byte"}),
+    "range_end": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "tooltip": "byte_range: end byte (0 = end of file)"}),
+    "tail_count": ("INT", {"default": 64, "min": 1, "max": 0xffffffff, "tooltip": "KB for last_kb and the first follow read, lines for last_lines"}),
+    "line_index": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "tooltip": "line: first line to return (0 = first line)"}),
+    "line_count": ("INT", {"default": 1, "min": 1, "max": 0xffffffff, "tooltip": "line: number of lines to return"}),
+    "auto_increment": ("BOOLEAN", {"default": False, "tooltip": "line: continue with the next lines on every run (wraps at the end)"}),
+    "json_path": ("STRING", {
+        "default": "",
+        "tooltip": "Return only this part of a JSON document, e.g. metadata.prompt or captions[17].text (empty = whole file)"
+    }),
+    "json_output": (["text", "compact_json"], {
+        "default": "text",
+        "tooltip": "json_path: text returns strings as they are and pretty-prints the rest, compact_json returns minified JSON"
+    }),
+    "change_detection": (["mtime", "content"], {
+        "default": "mtime",
+        "tooltip": "content: only rerun when the file's bytes change, not when it's just touched or re-synced"
+    }),
+}
+
+
+def load_text_slice(path, read_mode, range_start=0, range_end=0, tail_count=64, node_key=None,
+                    line_index=0, line_count=1, auto_increment=False):
+    """
+    Read part of a file for one of the partial READ_MODES
+    """
+    if read_mode == "byte_range":
+        return read_byte_range(path, range_start, range_end)
+    if read_mode == "last_kb":
+        return read_tail_bytes(path, tail_count * 1024)
+    if read_mode == "last_lines":
+        return read_tail_lines(path, tail_count)
+    if read_mode == "follow":
+        return read_follow(path, node_key, tail_count * 1024)
+    if read_mode == "line":
+        return read_lines(path, line_index, line_count, auto_increment, node_key)
+    raise ValueError(f"Unknown read mode: {read_mode}")
+
+
+def load_for_loader(path, st, read_mode="full", range_start=0, range_end=0, tail_count=64, line_index=0,
+                    line_count=1, auto_increment=False, json_path="", json_output="text", node_key=None):
+    """
+    Read one file for the Load Text nodes' settings, returning (text, json items).
+    Raises on read or parse errors; the nodes turn them into their error output.
+    """
+    if json_path.strip():
+        if read_mode != "full":
+            # Parse only the part that was read (e.g. one .jsonl line)
+            document = json.loads(load_text_slice(path, read_mode, range_start, range_end, tail_count,
+                                                  node_key, line_index, line_count, auto_increment))
+        else:
+            # Parsed once per file version, shared by every extraction from it
+            document = load_json_document(path, st)
+        return select_json_text(document, json_path, json_output)
+    
+    if read_mode != "full":
+        # Read only the requested part of the file
+        content = load_text_slice(path, read_mode, range_start, range_end, tail_count, node_key,
+                                  line_index, line_count, auto_increment)
+    else:
+        # Cached read; JSON files come back pretty-formatted
+        content = load_text_content(path, st)
+    
+    return (content, [content])
+
+
+class FolderListingCache:
+    """
+    Cached listing of supported text files per folder, built with os.scandir.
+    A listing is reused until the mtime of one of the scanned directories
+    changes (files added, removed or renamed). Editing a file in place doesn't
+    change its directory, so the mtime order is re-statted on every request.
+    """
+
+    def __init__(self, max_folders=32):
+        self.max_folders = max_folders
+        self._lock = threading.Lock()
+        self._listings = OrderedDict()
+        self._refreshing = set()
+
+    @staticmethod
+    def _scan(base_path, recursive):
+        dir_mtimes = {}
+        names = []
+        pending = [("", base_path)]
+        while pending:
+            rel_dir, dir_path = pending.pop()
+            # Stat before listing, so a change during the scan invalidates it next time
+            dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    rel_name = rel_dir + entry.name
+                    if entry.is_file() and is_supported_file(entry.name):
+                        names.append(rel_name)
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append((rel_name + "/", entry.path))
+        names.sort()
+        return {"dir_mtimes": dir_mtimes, "by_name": names}
+
+    @staticmethod
+    def _is_fresh(listing):
+        try:
+            return all(os.stat(d).st_mtime_ns == m for d, m in listing["dir_mtimes"].items())
+        except OSError:
+            return False
+
+    def list_files(self, base_path, recursive=False, sort="name"):
+        """
+        Return supported files under base_path (relative, "/"-separated), sorted by
+        name or by modification time (newest first)
+        """
+        key = (os.path.abspath(base_path), recursive)
+        with self._lock:
+            listing = self._listings.get(key)
+        if listing is None or not self._is_fresh(listing):
+            listing = self._scan(key[0], recursive)
+            with self._lock:
+                self._listings[key] = listing
+                self._listings.move_to_end(key)
+                while len(self._listings) > self.max_folders:
+                    self._listings.popitem(last=False)
+        if sort != "mtime":
+            return list(listing["by_name"])
+
+        # Not cached: a file that was just re-saved in place has to move to the front
+        def mtime(name):
+            try:
+                return os.stat(os.path.join(key[0], name)).st_mtime_ns
+            except OSError:
+                return 0
+        return sorted(listing["by_name"], key=mtime, reverse=True)
+
+    def snapshot(self, base_path, recursive=False):
+        """
+        Return the last known name-sorted listing without touching the disk
+        (None if the folder was never listed) and refresh it in the background
+        """
+        key = (os.path.abspath(base_path), recursive)
+        with self._lock:
+            listing = self._listings.get(key)
+            start_refresh = key not in self._refreshing
+            if start_refresh:
+                self._refreshing.add(key)
+        if start_refresh:
+            threading.Thread(target=self._refresh, args=key, name="TextToolsListingRefresh", daemon=True).start()
+        return list(listing["by_name"]) if listing is not None else None
+
+    def _refresh(self, base_path, recursive):
+        try:
+            if os.path.isdir(base_path):
+                self.list_files(base_path, recursive)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard((base_path, recursive))
+
+
+folder_listings = FolderListingCache()
+
+_GLOB_MAGIC = re.compile(r'[*?[]')
+
+
+def is_file_set_path(path):
+    """
+    Check whether a loader path names a set of files (a directory or a glob pattern)
+    rather than one file. An existing file whose name contains glob characters is one file.
+    """
+    if os.path.isdir(path):
+        return True
+    return _GLOB_MAGIC.search(path) is not None and not os.path.isfile(path)
+
+
+def resolve_file_set(path):
+    """
+    Return the supported files in a directory (not recursive) or matching a glob
+    pattern (** recurses), sorted by path so the order is deterministic
+    """
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in folder_listings.list_files(path)]
+    return sorted(match for match in glob.iglob(path, recursive=True)
+                  if is_supported_file(match) and os.path.isfile(match))
+
+
+def file_set_signature(paths, content=False):
+    """
+    Combined identity of a set of files, from their stat snapshots (or content digests)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        st = stat_snapshots.stat(path)
+        if st is None:
+            continue
+        part = content_digest(path, st) if content else repr(stat_identity(st))
+        digest.update(f"{path}\0{part}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+# Bounded pool for reading many files at once; reads release the GIL while waiting on disk
+_read_pool = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 4), thread_name_prefix="TextToolsRead")
+
+
+def map_files(read_one, paths):
+    """
+    Apply read_one to every path on the shared read pool, keeping the input order
+    """
+    if len(paths) <= 1:
+        return [read_one(path) for path in paths]
+    return list(_read_pool.map(read_one, paths))
+
+
+class _Inotify:
+    """
+    Minimal Linux inotify wrapper (via libc), used only to wake the folder
+    watcher as soon as a watched directory changes
+    """
+
+    # IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+    MASK = 0x100 | 0x200 | 0x40 | 0x80 | 0x400 | 0x800
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path):
+        return self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK) >= 0
+
+    def wait(self, timeout):
+        """
+        Block until something changed or timeout passed; pending events are discarded
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+
+class FolderWatcher:
+    """
+    Watches folders for added/removed text files and reports incremental
+    changes to a callback(name, added, removed). Uses inotify where available,
+    otherwise polls the cheap directory-mtime check of folder_listings.
+    """
+
+    def __init__(self, on_change, poll_interval=2.0):
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._folders = {}
+        self._thread = None
+        self._inotify = None
+        self._inotify_watched = set()
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+    @staticmethod
+    def _current_files(path):
+        if not os.path.isdir(path):
+            return set()
+        return set(folder_listings.list_files(path))
+
+    def watch(self, name, path):
+        """
+        Start reporting changes for folder `name` (no-op if already watched)
+        """
+        with self._lock:
+            if name in self._folders:
+                return
+            self._folders[name] = {"path": path, "files": self._current_files(path)}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="TextToolsFolderWatcher", daemon=True)
+                self._thread.start()
+        self._add_inotify_watch(path)
+
+    def _add_inotify_watch(self, path):
+        if self._inotify is not None and path not in self._inotify_watched and os.path.isdir(path):
+            if self._inotify.add_watch(path):
+                self._inotify_watched.add(path)
+
+    def _run(self):
+        while True:
+            if self._inotify is not None:
+                if self._inotify.wait(self.poll_interval):
+                    # Let a burst of changes settle into one update
+                    time.sleep(0.1)
+            else:
+                time.sleep(self.poll_interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[TextTools] Folder watcher error: {str(e)}")
+
+    def check(self):
+        """
+        Compare every watched folder with its last known listing and report differences
+        """
+        with self._lock:
+            folders = list(self._folders.items())
+        for name, state in folders:
+            # Folders created after watch() started (e.g. output/text)
+            self._add_inotify_watch(state["path"])
+            files = self._current_files(state["path"])
+            added = sorted(files - state["files"])
+            removed = sorted(state["files"] - files)
+            state["files"] = files
+            if added or removed:
+                self.on_change(name, added, removed)
@@ -1,9 +1,14 @@
-import os
-import json
+import stat
+from .Text_Tools_File_Utils_SG import (LOADER_OPTIONAL_INPUTS, UNSUPPORTED_TYPE_MESSAGE, content_digest, file_set_signature,
+                                       is_file_set_path, is_supported_file, load_for_loader, map_files, resolve_file_set,
+                                       stat_snapshots)
+from .Text_Tools_Url_Utils_SG import is_url, url_cache
 
 class TextToolsLoadTextFromAnywhereSG:
     """
-    A ComfyUI node for loading text, JSON, and Markdown files using direct file path input
+    A ComfyUI node for loading text, JSON, and Markdown files using direct file path input.
+    The path can also be a directory or a glob pattern to load a whole set of files,
+    or an http(s) URL (cached on disk and revalidated with ETag / Last-Modified).
     """
     
     @classmethod
@@ -16,14 +21,30 @@ class TextToolsLoadTextFromAnywhereSG:
                     "placeholder": "Enter full file path (e.g., C:/folder/file.txt)"
                 }),
                 "info_text": ("STRING", {
-                    "default": "Load text, Json, markdown file from anywhere. \nRight-click the file in File Explorer and select 'Copy as path' and paste in the box above. ",
+                    "default": "Load text, Json, markdown file from anywhere. \nRight-click the file in File Explorer and select 'Copy as path' and paste in the box above. \nA folder or a pattern like C:/captions/*.txt loads every matching file. http(s) URLs work too.",
                     "multiline": True,
                 }),
             },
+            "optional": {
+                **LOADER_OPTIONAL_INPUTS,
+                "file_separator": ("STRING", {
+                    "default": "\\n",
+                    "multiline": False,
+                    "tooltip": "Folder / pattern: text placed between files in text_content (\\n and \\t are newline and tab)"
+                }),
+                "url_timeout": ("INT", {"default": 30, "min": 1, "max": 600, "tooltip": "URL: seconds to wait for the server"}),
+                "url_max_mb": ("INT", {"default": 64, "min": 1, "max": 4096, "tooltip": "URL: largest response to download, in MB"}),
+            },
+            "hidden": {
+                "unique_id": "UNIQUE_ID",
+            },
         }
     
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("text_content",)
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("text_content", "json_items", "file_texts")
+    # json_items: one output per element when json_path selects an array
+    # file_texts: one output per file when a folder or pattern is loaded
+    OUTPUT_IS_LIST = (False, True, True)
     FUNCTION = "load_file"
     CATEGORY = "utils"
     OUTPUT_NODE = True
@@ -39,67 +60,133 @@ class TextToolsLoadTextFromAnywhereSG:
         # Remove quotes and strip whitespace
         file_path = file_path.strip().strip('"').strip("'")
         
-        if not os.path.exists(file_path):
+        # URLs are checked when they're fetched
+        if is_url(file_path):
+            return True
+        
+        if is_file_set_path(file_path):
+            if not resolve_file_set(file_path):
+                return f"No supported files found for: {file_path}"
+            return True
+        
+        # One stat, shared with IS_CHANGED and load_file for this prompt
+        st = stat_snapshots.stat(file_path)
+        if st is None:
             return f"File not found: {file_path}"
         
-        if not os.path.isfile(file_path):
+        if not stat.S_ISREG(st.st_mode):
             return f"Path is not a file: {file_path}"
         
-        if not file_path.endswith(('.txt', '.json', '.md')):
-            return f"Invalid file type. Only .txt, .json, and .md files are supported"
+        if not is_supported_file(file_path):
+            return UNSUPPORTED_TYPE_MESSAGE
         
         return True
     
-    def load_file(self, file_path, info_text=""):
+    def load_file(self, file_path, info_text="", read_mode="full", range_start=0, range_end=0,
+                  tail_count=64, line_index=0, line_count=1, auto_increment=False, json_path="", json_output="text",
+                  change_detection="mtime", file_separator="\\n", url_timeout=30, url_max_mb=64, unique_id=None):
         """
         Load and return the content of the specified text, JSON, or Markdown file
+        (or of every file in a folder / matching a pattern)
         """
         if not file_path or file_path.strip() == "":
-            return ("No file path specified",)
+            return ("No file path specified", ["No file path specified"], ["No file path specified"])
         
         # Remove quotes and strip whitespace
         file_path = file_path.strip().strip('"').strip("'")
         
-        # Check if file exists
-        if not os.path.exists(file_path):
+        def read_one(path):
+            st = stat_snapshots.stat(path)
+            if st is None:
+                raise FileNotFoundError(f"File not found: {path}")
+            return load_for_loader(path, st, read_mode, range_start, range_end, tail_count, line_index, line_count,
+                                   auto_increment, json_path, json_output, unique_id)
+        
+        if is_url(file_path):
+            try:
+                # Served from the on-disk cache when the server answers 304
+                cached_path, _ = url_cache.fetch(file_path, url_timeout, url_max_mb * 1024 * 1024)
+                content, items = read_one(cached_path)
+                return (content, items, [content])
+            except Exception as e:
+                error_msg = f"Error loading URL: {str(e)}"
+                return (error_msg, [error_msg], [error_msg])
+        
+        if is_file_set_path(file_path):
+            paths = resolve_file_set(file_path)
+            if not paths:
+                error_msg = f"No supported files found for: {file_path}"
+                return (error_msg, [error_msg], [error_msg])
+            
+            def read_one_safe(path):
+                try:
+                    return read_one(path)
+                except Exception as e:
+                    error_msg = f"Error loading file {path}: {str(e)}"
+                    return (error_msg, [error_msg])
+            
+            # Files are read in parallel; results keep the sorted path order
+            results = map_files(read_one_safe, paths)
+            texts = [text for text, _ in results]
+            items = [item for _, file_items in results for item in file_items]
+            separator = file_separator.replace("\\n", "\n").replace("\\t", "\t")
+            return (separator.join(texts), items, texts)
+        
+        # Check if file exists (stat shared with VALIDATE_INPUTS / IS_CHANGED and the content cache)
+        st = stat_snapshots.stat(file_path)
+        if st is None:
             error_msg = f"File not found: {file_path}"
-            return (error_msg,)
+            return (error_msg, [error_msg], [error_msg])
         
         # Check if it's a file
-        if not os.path.isfile(file_path):
+        if not stat.S_ISREG(st.st_mode):
             error_msg = f"Path is not a file: {file_path}"
-            return (error_msg,)
+            return (error_msg, [error_msg], [error_msg])
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # If it's a JSON file, pretty-format it
-            if file_path.endswith('.json'):
-                try:
-                    json_data = json.loads(content)
-                    content = json.dumps(json_data, indent=2, ensure_ascii=False)
-                except json.JSONDecodeError:
-                    pass
-            
-            return (content,)
+            content, items = read_one(file_path)
+            return (content, items, [content])
         
         except Exception as e:
             error_msg = f"Error loading file: {str(e)}"
-            return (error_msg,)
+            return (error_msg, [error_msg], [error_msg])
     
     @classmethod
-    def IS_CHANGED(cls, file_path, info_text=""):
+    def IS_CHANGED(cls, file_path, info_text="", **kwargs):
+        # Auto-incrementing line mode returns the next lines on every run
+        if kwargs.get("read_mode") == "line" and kwargs.get("auto_increment"):
+            return float("NaN")
+        
         if not file_path or file_path.strip() == "":
             return float("NaN")
         
         # Remove quotes and strip whitespace
         file_path = file_path.strip().strip('"').strip("'")
         
-        if os.path.exists(file_path):
-            return os.path.getmtime(file_path)
+        if is_url(file_path):
+            # Conditional GET; the body is only downloaded again if the server has a new version
+            try:
+                _, meta = url_cache.fetch(file_path, kwargs.get("url_timeout", 30),
+                                          kwargs.get("url_max_mb", 64) * 1024 * 1024)
+            except Exception:
+                return float("NaN")
+            return meta["digest"]
+        
+        if is_file_set_path(file_path):
+            # Same matched files with the same stats (or bytes) means nothing to reload
+            paths = resolve_file_set(file_path)
+            if not paths:
+                return float("NaN")
+            return file_set_signature(paths, content=kwargs.get("change_detection") == "content")
+        
+        st = stat_snapshots.stat(file_path)
+        if st is None:
+            return float("NaN")
+        
+        if kwargs.get("change_detection") == "content":
+            return content_digest(file_path, st)
         
-        return float("NaN")
+        return st.st_mtime
 
 # Node registration
 NODE_CLASS_MAPPINGS = {
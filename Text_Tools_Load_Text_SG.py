@@ -1,31 +1,45 @@
 import os
-import json
+import stat
+import asyncio
 import folder_paths
 from server import PromptServer
 from aiohttp import web
+from .Text_Tools_File_Utils_SG import (LOADER_OPTIONAL_INPUTS, UNSUPPORTED_TYPE_MESSAGE, FolderWatcher, content_digest,
+                                       folder_listings, is_supported_file, load_for_loader, stat_snapshots)
 
 class TextToolsLoadTextSG:
     """
     A ComfyUI node for loading text, JSON, and Markdown files with folder and file selection capability
     """
     
+    FOLDERS = ["comfyui_root", "input", "output", "output_text", "temp"]
+    
     @classmethod
     def INPUT_TYPES(cls):
-        # Get initial file list for default folder
-        initial_files = cls.get_files_for_folder("input")
+        # Last known file list for the default folder; never scans the folder here so
+        # startup and /object_info don't wait on it (the frontend fetches the live list)
+        initial_files = folder_listings.snapshot(cls.get_folder_path("input"))
         return {
             "required": {
-                "folder": (["comfyui_root", "input", "output", "output_text", "temp"], {"default": "input"}),
+                "folder": (cls.FOLDERS, {"default": "input"}),
                 "file": (initial_files if initial_files else [""], {}),
                 "info_text": ("STRING", {
-                    "default": "Supports .txt, .json, and .md files. \ncomfyui_root is where you run comfy from.\noutput_text is a folder named text if present in ouput folder.",
+                    "default": "Supports .txt, .json, .jsonl and .md files (also .gz, .xz, .bz2 compressed). \ncomfyui_root is where you run comfy from.\noutput_text is a folder named text if present in ouput folder.",
                     "multiline": True,
                 }),
             },
+            "optional": {
+                **LOADER_OPTIONAL_INPUTS,
+            },
+            "hidden": {
+                "unique_id": "UNIQUE_ID",
+            },
         }
     
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("text_content",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("text_content", "json_items")
+    # json_items: one output per element when json_path selects an array
+    OUTPUT_IS_LIST = (False, True)
     FUNCTION = "load_file"
     CATEGORY = "utils"
     OUTPUT_NODE = True
@@ -41,11 +55,13 @@ class TextToolsLoadTextSG:
         base_path = cls.get_folder_path(folder)
         full_path = os.path.join(base_path, file)
         
-        if not os.path.exists(full_path):
+        # Check the chosen file directly rather than against the folder listing
+        st = stat_snapshots.stat(full_path)
+        if st is None or not stat.S_ISREG(st.st_mode):
             return f"File not found: {file} in {folder} folder"
         
-        if not file.endswith(('.txt', '.json', '.md')):
-            return f"Invalid file type. Only .txt, .json, and .md files are supported"
+        if not is_supported_file(file):
+            return UNSUPPORTED_TYPE_MESSAGE
         
         return True
     
@@ -71,84 +87,120 @@ class TextToolsLoadTextSG:
         return path
     
     @classmethod
-    def get_files_for_folder(cls, folder):
+    def get_files_for_folder(cls, folder, recursive=False, sort="name"):
         """
         Get list of text/json/md files for the selected folder
+        (cached until the folder changes; recursive adds "subfolder/file" entries)
         """
         base_path = cls.get_folder_path(folder)
         try:
             if not os.path.exists(base_path):
                 return []
             
-            all_files = os.listdir(base_path)
-            files = []
-            for f in all_files:
-                full_path = os.path.join(base_path, f)
-                if os.path.isfile(full_path) and f.endswith(('.txt', '.json', '.md')):
-                    files.append(f)
-            
-            return sorted(files)
+            return folder_listings.list_files(base_path, recursive, sort)
         except Exception as e:
             import traceback
             return []
     
-    def load_file(self, folder, file, info_text=""):
+    def load_file(self, folder, file, info_text="", read_mode="full", range_start=0, range_end=0,
+                  tail_count=64, line_index=0, line_count=1, auto_increment=False, json_path="", json_output="text",
+                  change_detection="mtime", unique_id=None):
         """
         Load and return the content of the selected text, JSON, or Markdown file
         """
         if not file or file == "":
-            return ("No file specified",)
+            return ("No file specified", ["No file specified"])
         
         base_path = self.get_folder_path(folder)
         target_path = os.path.join(base_path, file)
         
-        # Check if file exists
-        if not os.path.exists(target_path):
+        # Check if file exists (stat shared with VALIDATE_INPUTS / IS_CHANGED and the content cache)
+        st = stat_snapshots.stat(target_path)
+        if st is None:
             error_msg = f"File not found: {target_path}"
-            return (error_msg,)
+            return (error_msg, [error_msg])
         
         try:
-            with open(target_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # If it's a JSON file, pretty-format it
-            if target_path.endswith('.json'):
-                try:
-                    json_data = json.loads(content)
-                    content = json.dumps(json_data, indent=2, ensure_ascii=False)
-                except json.JSONDecodeError:
-                    pass
-            
-            return (content,)
+            return load_for_loader(target_path, st, read_mode, range_start, range_end, tail_count, line_index,
+                                   line_count, auto_increment, json_path, json_output, unique_id)
         
         except Exception as e:
             error_msg = f"Error loading file: {str(e)}"
-            return (error_msg,)
+            return (error_msg, [error_msg])
     
     @classmethod
-    def IS_CHANGED(cls, folder, file, info_text=""):
+    def IS_CHANGED(cls, folder, file, info_text="", **kwargs):
+        # Auto-incrementing line mode returns the next lines on every run
+        if kwargs.get("read_mode") == "line" and kwargs.get("auto_increment"):
+            return float("NaN")
+        
         if not file:
             return float("NaN")
         
         base_path = cls.get_folder_path(folder)
         target_path = os.path.join(base_path, file)
         
-        if os.path.exists(target_path):
-            return os.path.getmtime(target_path)
+        st = stat_snapshots.stat(target_path)
+        if st is None:
+            return float("NaN")
+        
+        if kwargs.get("change_detection") == "content":
+            return content_digest(target_path, st)
         
-        return float("NaN")
+        return st.st_mtime
+
+def send_folder_change(folder, added, removed):
+    """
+    Push incremental file list changes to the frontend
+    """
+    PromptServer.instance.send_sync("text_tools_folder_changed", {
+        "folder": folder,
+        "added": added,
+        "removed": removed
+    })
+
+folder_watcher = FolderWatcher(send_folder_change)
 
 # API Route
 @PromptServer.instance.routes.post("/text_file_loader/files")
 async def get_files_for_folder_api(request):
     """
-    API endpoint to get files for a selected folder
+    API endpoint to get files for a selected folder.
+    Optional body fields: recursive, sort ("name" or "mtime"), prefix, filter
+    (case-insensitive substring), offset and limit. subscribe starts push
+    updates for the folder ("text_tools_folder_changed" events).
     """
     try:
         data = await request.json()
         folder = data.get("folder", "input")
-        files = TextToolsLoadTextSG.get_files_for_folder(folder)
-        return web.json_response({"files": files, "success": True})
+        recursive = bool(data.get("recursive", False))
+        sort = data.get("sort", "name")
+        
+        # Listing can touch a lot of files, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, TextToolsLoadTextSG.get_files_for_folder, folder, recursive, sort)
+        
+        if data.get("subscribe") and folder in TextToolsLoadTextSG.FOLDERS:
+            base_path = TextToolsLoadTextSG.get_folder_path(folder)
+            await loop.run_in_executor(None, folder_watcher.watch, folder, base_path)
+        
+        prefix = data.get("prefix")
+        if prefix:
+            files = [f for f in files if f.startswith(prefix)]
+        filter_text = data.get("filter")
+        if filter_text:
+            filter_text = filter_text.lower()
+            files = [f for f in files if filter_text in f.lower()]
+        
+        total = len(files)
+        offset = max(0, int(data.get("offset", 0)))
+        limit = int(data.get("limit", 0))
+        if limit > 0:
+            files = files[offset:offset + limit]
+        elif offset:
+            files = files[offset:]
+        
+        return web.json_response({"files": files, "total": total, "success": True})
     except Exception as e:
         import traceback
         return web.json_response({"error": str(e), "files": [], "success": False}, status=500)
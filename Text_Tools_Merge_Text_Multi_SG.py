@@ -1,98 +1,71 @@
+from .Text_Tools_Merge_Utils_SG import INSERT_SEPARATOR_OPTIONS, broadcast_columns, compile_merge_plan, merge_row
+
+# Highest number of text inputs the node offers (the frontend shows input_count of them)
+MAX_TEXT_INPUTS = 16
+
 class TextToolsMergeTextMultiSG:
     """
     A ComfyUI node with dynamic text inputs controlled by enable toggles.
+    Text inputs can also be lists; each row is merged and a list is returned.
     """
     
     @classmethod
     def INPUT_TYPES(cls):
+        optional = {}
+        for i in range(3, MAX_TEXT_INPUTS + 1):
+            optional[f"text_{i}"] = ("STRING", {"multiline": True, "default": ""})
+            optional[f"⬆️_enable_{i}"] = ("BOOLEAN", {"default": True})
+            if i == 5:
+                # After the original five inputs so saved workflows keep their widget values
+                optional["input_count"] = ("INT", {"default": 5, "min": 2, "max": MAX_TEXT_INPUTS,
+                                                   "tooltip": "Number of text inputs to show and merge"})
         return {
             "required": {
                 "text_order": (["Sequential", "Custom"],),
                 "custom_order": ("STRING", {"default": "1,2,3", "multiline": False}),
                 "separator": ("STRING", {"default": ", ", "multiline": False}),
-                "insert_separator": (["None", "Before", "After", "Between", "Before and After", "Before and Between", "After and Between", "Before, Between, After"], {"default": "Before, Between, After"}),
+                "insert_separator": (INSERT_SEPARATOR_OPTIONS, {"default": "Before, Between, After"}),
                 "text_1": ("STRING", {"multiline": True, "default": ""}),
                 "⬆️_enable_1": ("BOOLEAN", {"default": True}),
                 "text_2": ("STRING", {"multiline": True, "default": ""}),
                 "⬆️_enable_2": ("BOOLEAN", {"default": True}),
             },
-            "optional": {
-                "text_3": ("STRING", {"multiline": True, "default": ""}),
-                "⬆️_enable_3": ("BOOLEAN", {"default": True}),
-                "text_4": ("STRING", {"multiline": True, "default": ""}),
-                "⬆️_enable_4": ("BOOLEAN", {"default": True}),
-                "text_5": ("STRING", {"multiline": True, "default": ""}),
-                "⬆️_enable_5": ("BOOLEAN", {"default": True}),
-            },
+            "optional": optional,
         }
     
+    # Every input arrives as a list so a whole batch of rows is merged in one call
+    INPUT_IS_LIST = True
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("merged_text",)
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "merge_texts"
     CATEGORY = "text"
     
-    def merge_texts(self, text_order, separator, insert_separator, text_1="", text_2="", text_3="", text_4="", text_5="",
-                    **kwargs):
+    def merge_texts(self, text_order, separator, insert_separator, **kwargs):
         """
         Merges multiple text inputs based on order and custom separator position.
+        Single texts are repeated for every row of the longest list input.
         """
-        # Extract enable values from kwargs
-        enable_1 = kwargs.get("⬆️_enable_1", True)
-        enable_2 = kwargs.get("⬆️_enable_2", True)
-        enable_3 = kwargs.get("⬆️_enable_3", True)
-        enable_4 = kwargs.get("⬆️_enable_4", True)
-        enable_5 = kwargs.get("⬆️_enable_5", True)
-        
-        custom_order = kwargs.get("custom_order", "1,2,3")
-        
-        # Collect all texts and their enable states
-        all_texts = [text_1, text_2, text_3, text_4, text_5]
-        all_enables = [enable_1, enable_2, enable_3, enable_4, enable_5]
+        def setting(name, default):
+            value = kwargs.get(name, default)
+            return value[0] if isinstance(value, list) else value
         
-        # Get only active texts based on enable state
-        texts = []
-        for i in range(10):
-            if all_enables[i] and all_texts[i]:
-                texts.append((i, all_texts[i]))
+        text_order = text_order[0]
+        separator = separator[0]
+        insert_separator = insert_separator[0]
+        custom_order = setting("custom_order", "1,2,3")
+        input_count = max(2, min(int(setting("input_count", 5)), MAX_TEXT_INPUTS))
         
-        # Determine the order
-        if text_order == "Sequential":
-            ordered_texts = [text for idx, text in texts]
-        else:  # Custom order
-            try:
-                order_indices = [int(x.strip()) - 1 for x in custom_order.split(",")]
-                ordered_texts = []
-                for idx in order_indices:
-                    for text_idx, text in texts:
-                        if text_idx == idx:
-                            ordered_texts.append(text)
-                            break
-            except:
-                ordered_texts = [text for idx, text in texts]
+        enabled = tuple(bool(setting(f"⬆️_enable_{i}", True)) for i in range(1, input_count + 1))
+        plan = compile_merge_plan(text_order, custom_order, enabled, insert_separator)
         
-        # Apply separator positioning
-        if not ordered_texts:
-            merged = ""
-        elif insert_separator == "None":
-            merged = "".join(ordered_texts)
-        elif insert_separator == "Before":
-            merged = separator + "".join(ordered_texts)
-        elif insert_separator == "After":
-            merged = "".join(ordered_texts) + separator
-        elif insert_separator == "Between":
-            merged = separator.join(ordered_texts)
-        elif insert_separator == "Before and After":
-            merged = separator + "".join(ordered_texts) + separator
-        elif insert_separator == "Before and Between":
-            merged = separator + separator.join(ordered_texts)
-        elif insert_separator == "After and Between":
-            merged = separator.join(ordered_texts) + separator
-        elif insert_separator == "Before, Between, After":
-            merged = separator + separator.join(ordered_texts) + separator
-        else:
-            merged = "".join(ordered_texts)
+        columns = []
+        for i in range(1, input_count + 1):
+            column = kwargs.get(f"text_{i}")
+            columns.append(column if isinstance(column, list) else [column])
         
-        return (merged,)
+        # Single values are used for every row of the longest list
+        return ([merge_row(row, plan, separator) for row in zip(*broadcast_columns(columns))],)
 
 # Node registration
 NODE_CLASS_MAPPINGS = {
@@ -1,4 +1,5 @@
 import os
+from .Text_Tools_Merge_Utils_SG import INSERT_SEPARATOR_OPTIONS, broadcast_columns, separator_layout
 
 class TextToolsMergeTextSG:
     """
@@ -15,14 +16,15 @@ class TextToolsMergeTextSG:
             "required": {
                 "order": (["Text1 + Text2", "Text2 + Text1"],),
                 "separator": ("STRING", {"default": ", ", "multiline": False}),
-                "insert_separator": (["None", "Before", "After", "Between",
-                                      "Before and After", "Before and Between",
-                                      "After and Between", "Before, Between, After"],),
+                "insert_separator": (INSERT_SEPARATOR_OPTIONS,),
             },
         }
     
+    # Text inputs may be lists; each pair is merged and a list is returned
+    INPUT_IS_LIST = True
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("merged_text",)
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "merge_texts"
     CATEGORY = "text"
     
@@ -31,48 +33,37 @@ class TextToolsMergeTextSG:
         Merges two texts based on order and custom separator position preferences.
         
         Args:
-            text1: First text input (optional)
-            text2: Second text input (optional)
+            text1: First text input, or a list of texts (optional)
+            text2: Second text input, or a list of texts (optional)
             order: Order of merging ("Text1 + Text2" or "Text2 + Text1")
             separator: Custom text to use as separator (can be comma, space, dot, etc.)
             insert_separator: Where to place the separator
         
         Returns:
-            Merged text string
+            List of merged texts, one per row of the longer text list
         """
-        # Handle None values (from disabled nodes)
-        text1 = text1 if text1 is not None else ""
-        text2 = text2 if text2 is not None else ""
+        # Widget values arrive as one-item lists
+        order = order[0]
+        separator = separator[0]
+        insert_separator = insert_separator[0]
+        
+        # None values (from disabled nodes) become ""; a single text is used for every
+        # row, otherwise the shorter list repeats its last item
+        text1, text2 = broadcast_columns([text1 or [], text2 or []])
         
         # Determine the order
         if order == "Text1 + Text2":
-            first_text = text1
-            second_text = text2
+            first_texts, second_texts = text1, text2
         else:  # "Text2 + Text1"
-            first_text = text2
-            second_text = text1
+            first_texts, second_texts = text2, text1
         
-        # Apply separator positioning
-        if insert_separator == "None":
-            merged = first_text + second_text
-        elif insert_separator == "Before":
-            merged = separator + first_text + second_text
-        elif insert_separator == "After":
-            merged = first_text + second_text + separator
-        elif insert_separator == "Between":
-            merged = first_text + separator + second_text
-        elif insert_separator == "Before and After":
-            merged = separator + first_text + second_text + separator
-        elif insert_separator == "Before and Between":
-            merged = separator + first_text + separator + second_text
-        elif insert_separator == "After and Between":
-            merged = first_text + separator + second_text + separator
-        elif insert_separator == "Before, Between, After":
-            merged = separator + first_text + separator + second_text + separator
-        else:
-            merged = first_text + second_text
+        # Separator positioning, resolved once for all rows (empty texts keep their separators)
+        before, between, after = separator_layout(insert_separator)
+        prefix = separator if before else ""
+        middle = separator if between else ""
+        suffix = separator if after else ""
         
-        return (merged,)
+        return ([prefix + first + middle + second + suffix for first, second in zip(first_texts, second_texts)],)
 
 # Node registration
 NODE_CLASS_MAPPINGS = {
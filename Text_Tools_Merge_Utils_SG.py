@@ -0,0 +1,67 @@
+import functools
+
+INSERT_SEPARATOR_OPTIONS = ["None", "Before", "After", "Between", "Before and After", "Before and Between",
+                            "After and Between", "Before, Between, After"]
+
+# insert_separator option -> (before, between, after)
+SEPARATOR_LAYOUTS = {
+    "None": (False, False, False),
+    "Before": (True, False, False),
+    "After": (False, False, True),
+    "Between": (False, True, False),
+    "Before and After": (True, False, True),
+    "Before and Between": (True, True, False),
+    "After and Between": (False, True, True),
+    "Before, Between, After": (True, True, True),
+}
+
+
+def separator_layout(insert_separator):
+    """
+    (before, between, after) flags for an insert_separator option
+    """
+    return SEPARATOR_LAYOUTS.get(insert_separator, (False, False, False))
+
+
+@functools.lru_cache(maxsize=128)
+def compile_merge_plan(text_order, custom_order, enabled, insert_separator):
+    """
+    Turn the node settings into (input indices in merge order, before, between, after).
+    enabled is a tuple with one flag per visible input.
+    """
+    active = [i for i, enable in enumerate(enabled) if enable]
+    order = active
+    if text_order == "Custom":
+        try:
+            active_set = set(active)
+            order = [i for i in (int(x.strip()) - 1 for x in custom_order.split(",")) if i in active_set]
+        except ValueError:
+            order = active
+    return (tuple(order),) + separator_layout(insert_separator)
+
+
+def merge_row(texts, plan, separator):
+    """
+    Merge one row of texts with a plan from compile_merge_plan; empty texts are skipped
+    """
+    order, before, between, after = plan
+    parts = [texts[i] for i in order if texts[i]]
+    if not parts:
+        return ""
+    merged = (separator if between else "").join(parts)
+    if before:
+        merged = separator + merged
+    if after:
+        merged += separator
+    return merged
+
+
+def broadcast_columns(columns):
+    """
+    Pad text list inputs to the same number of rows: a single text is used for
+    every row, and a shorter list repeats its last item like ComfyUI does.
+    None and missing texts become "".
+    """
+    columns = [[text if text is not None else "" for text in column] or [""] for column in columns]
+    rows = max((len(column) for column in columns), default=1)
+    return [column + column[-1:] * (rows - len(column)) for column in columns]
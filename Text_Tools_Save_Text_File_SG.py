@@ -1,8 +1,369 @@
 import os
 import json
+import hashlib
 import folder_paths
 from datetime import datetime
 import re
+import queue
+import atexit
+import threading
+from collections import OrderedDict
+from server import PromptServer
+from .Text_Tools_File_Utils_SG import COMPRESSION_SUFFIXES, pretty_json_text, write_text_file
+from .Text_Tools_Search_Index_SG import search_index
+
+
+class FilenameCounterIndex:
+    """
+    In-memory index of the next free counter per (directory, prefix, extension).
+    Each key is built once with a single os.scandir pass and then advanced in O(1).
+    Files are claimed with an exclusive create, so files added outside the index
+    are skipped instead of overwritten.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_counter = {}
+
+    @staticmethod
+    def _scan(directory, prefix, extension, separator="_"):
+        """
+        Return one past the highest existing counter for prefix/extension in directory
+        """
+        pattern = re.compile(re.escape(prefix + separator) + r"(\d+)\." + re.escape(extension) + r"$")
+        highest = 0
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    match = pattern.match(entry.name)
+                    if match:
+                        highest = max(highest, int(match.group(1)))
+        except FileNotFoundError:
+            pass
+        return highest + 1
+
+    def claim(self, directory, prefix, extension, separator="_"):
+        """
+        Reserve the next free filename (prefix, separator, counter, extension) and
+        create it empty. Returns (filename, full_path).
+        """
+        key = (os.path.normcase(os.path.abspath(directory)), prefix + separator, extension)
+        with self._lock:
+            counter = self._next_counter.get(key)
+            if counter is None:
+                counter = self._scan(directory, prefix, extension, separator)
+            while True:
+                filename = f"{prefix}{separator}{counter:05d}.{extension}"
+                full_path = os.path.join(directory, filename)
+                try:
+                    fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+                except FileExistsError:
+                    # Created outside the index, move past it
+                    counter += 1
+                    continue
+                os.close(fd)
+                self._next_counter[key] = counter + 1
+                return filename, full_path
+
+
+_counter_index = FilenameCounterIndex()
+
+# Per-directory index file of the dedup modes (not a supported text type, so loaders don't list it)
+DEDUP_INDEX_NAME = ".text_tools_dedup_index"
+# Sidecar of an append_txt log holding its record count and size (not a supported text type either)
+RECORD_COUNT_SUFFIX = ".records"
+
+
+class SavedContentIndex:
+    """
+    Persistent index of saved file content per output directory (sha256 of the
+    extension and text -> file name) for the dedup modes. Each directory keeps
+    one "digest size mtime_ns filename" line per saved file in DEDUP_INDEX_NAME;
+    an entry whose file has since been changed or removed is ignored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # directory -> {digest: [filename, size, mtime_ns]}; size is None while the write is queued
+        self._dirs = {}
+
+    @staticmethod
+    def content_key(content, extension):
+        digest = hashlib.sha256(extension.encode('utf-8') + b"\0")
+        digest.update(content.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _entries(self, directory):
+        key = os.path.normcase(os.path.abspath(directory))
+        entries = self._dirs.get(key)
+        if entries is None:
+            entries = {}
+            try:
+                with open(os.path.join(directory, DEDUP_INDEX_NAME), encoding='utf-8') as f:
+                    for line in f:
+                        parts = line.rstrip("\n").split("\t", 3)
+                        if len(parts) == 4 and parts[1].isdigit() and parts[2].isdigit():
+                            # Later lines win
+                            entries[parts[0]] = [parts[3], int(parts[1]), int(parts[2])]
+            except FileNotFoundError:
+                pass
+            self._dirs[key] = entries
+        return entries
+
+    def find(self, directory, digest):
+        """
+        Name of the saved file in directory with this content, or None
+        """
+        with self._lock:
+            entries = self._entries(directory)
+            entry = entries.get(digest)
+            if entry is None:
+                return None
+            filename, size, mtime_ns = entry
+            if size is None:
+                # Still queued; file operations on it run after its write
+                return filename
+            try:
+                st = os.stat(os.path.join(directory, filename))
+            except OSError:
+                st = None
+            if st is None or st.st_size != size or st.st_mtime_ns != mtime_ns:
+                del entries[digest]
+                return None
+            return filename
+
+    def reserve(self, directory, digest, filename):
+        """
+        Make filename the copy of this content before its (background) write finishes
+        """
+        with self._lock:
+            self._entries(directory)[digest] = [filename, None, None]
+
+    def discard(self, directory, digest, filename):
+        """
+        Forget a reserved file whose write failed
+        """
+        with self._lock:
+            entries = self._entries(directory)
+            if entries.get(digest, [None])[0] == filename:
+                del entries[digest]
+
+    def record(self, directory, digest, filename):
+        """
+        Record a written file and add it to the directory's index file
+        """
+        try:
+            st = os.stat(os.path.join(directory, filename))
+        except OSError:
+            self.discard(directory, digest, filename)
+            return
+        with self._lock:
+            self._entries(directory)[digest] = [filename, st.st_size, st.st_mtime_ns]
+            if "\n" not in filename:
+                with open(os.path.join(directory, DEDUP_INDEX_NAME), 'a', encoding='utf-8', newline='\n') as f:
+                    f.write(f"{digest}\t{st.st_size}\t{st.st_mtime_ns}\t{filename}\n")
+
+
+_saved_contents = SavedContentIndex()
+
+
+class BackgroundTextWriter:
+    """
+    Bounded background writer so graph execution doesn't wait on disk I/O.
+    submit() blocks when the queue is full (backpressure) and the queue is
+    drained on interpreter shutdown.
+    """
+
+    def __init__(self, max_pending=256):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="TextToolsSaveTextWriter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                func, args = job
+                try:
+                    func(*args)
+                except Exception as e:
+                    print(f"Error saving file: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, func, *args):
+        """
+        Queue a write call, blocking while the queue is full
+        """
+        self._ensure_started()
+        self._queue.put((func, args))
+
+    def drain(self):
+        """
+        Wait until every queued write has been written
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def shutdown(self):
+        """
+        Write everything still queued and stop the worker thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+class AppendLogWriter:
+    """
+    Keeps one open buffered handle per log file so append-mode saves don't
+    reopen the file on every execution. Logs are rotated by size or record
+    count to prefix.00001.extension, prefix.00002.extension, ..., numbered
+    apart from the prefix_00001 files of regular saves. Text log records can
+    span lines, so their count is kept in a <log>.records sidecar for restarts.
+    """
+
+    def __init__(self, max_open=32):
+        self._lock = threading.Lock()
+        self._logs = OrderedDict()
+        self.max_open = max_open
+
+    @staticmethod
+    def _count_records(full_path, extension, size):
+        if extension == "txt":
+            # Only trusted while the log is the size it had when the count was written
+            try:
+                with open(full_path + RECORD_COUNT_SUFFIX, 'r', encoding='utf-8') as f:
+                    records, counted_size = (int(v) for v in f.read().split())
+                return records if counted_size == size else 0
+            except (OSError, ValueError):
+                return 0
+        try:
+            with open(full_path, 'rb') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def _get_log(self, full_path, extension):
+        log = self._logs.get(full_path)
+        if log is not None:
+            self._logs.move_to_end(full_path)
+            return log
+        handle = open(full_path, 'a', encoding='utf-8', newline='\n')
+        size = os.fstat(handle.fileno()).st_size
+        log = {
+            "handle": handle,
+            "size": size,
+            "records": self._count_records(full_path, extension, size),
+        }
+        self._logs[full_path] = log
+        while len(self._logs) > self.max_open:
+            _, oldest = self._logs.popitem(last=False)
+            oldest["handle"].close()
+        return log
+
+    def _rotate(self, full_path, directory, prefix, extension):
+        log = self._logs.pop(full_path)
+        log["handle"].close()
+        _, rotated_path = _counter_index.claim(directory, prefix, extension, separator=".")
+        os.replace(full_path, rotated_path)
+        try:
+            os.remove(full_path + RECORD_COUNT_SUFFIX)
+        except OSError:
+            pass
+
+    def append(self, directory, prefix, extension, record, max_bytes=0, max_records=0, fsync=False):
+        """
+        Append one record to directory/prefix.extension, rotating first if a limit would be exceeded
+        """
+        full_path = os.path.join(directory, f"{prefix}.{extension}")
+        data_size = len(record.encode('utf-8'))
+        with self._lock:
+            log = self._get_log(full_path, extension)
+            over_size = max_bytes > 0 and log["size"] > 0 and log["size"] + data_size > max_bytes
+            over_count = max_records > 0 and log["records"] >= max_records
+            if over_size or over_count:
+                self._rotate(full_path, directory, prefix, extension)
+                log = self._get_log(full_path, extension)
+            handle = log["handle"]
+            handle.write(record)
+            handle.flush()
+            if fsync:
+                os.fsync(handle.fileno())
+            log["size"] += data_size
+            log["records"] += 1
+            if extension == "txt":
+                try:
+                    with open(full_path + RECORD_COUNT_SUFFIX, 'w', encoding='utf-8') as f:
+                        f.write(f"{log['records']} {log['size']}\n")
+                except OSError:
+                    # Read-only sidecar, the count still holds until the next restart
+                    pass
+
+    def close_all(self):
+        with self._lock:
+            while self._logs:
+                _, log = self._logs.popitem()
+                log["handle"].close()
+
+
+def write_and_index(full_path, content, fsync=False, compression="none", compression_level=6, dedup_key=None):
+    """
+    Write a saved file, then record it for dedup and add it to the content search index
+    """
+    directory, filename = os.path.split(full_path)
+    try:
+        write_text_file(full_path, content, fsync, compression, compression_level)
+    except Exception:
+        # Don't leave the claimed file behind empty or half-written (also when
+        # this runs on the background writer, after the ui reported the name)
+        try:
+            os.remove(full_path)
+        except OSError:
+            pass
+        if dedup_key is not None:
+            _saved_contents.discard(directory, dedup_key, filename)
+        raise
+    if dedup_key is not None:
+        _saved_contents.record(directory, dedup_key, filename)
+    search_index.notify(full_path)
+
+
+def link_or_write(existing_path, full_path, *write_args):
+    """
+    Make the claimed full_path a hardlink to existing_path (same content).
+    Returns False if it had to be written as a copy instead.
+    """
+    tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(existing_path, tmp_path)
+        os.replace(tmp_path, full_path)
+    except OSError:
+        # No hardlinks on this filesystem (e.g. FAT), or the file is gone
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        write_and_index(full_path, *write_args)
+        return False
+    search_index.notify(full_path)
+    return True
+
+
+_append_logs = AppendLogWriter()
+_background_writer = BackgroundTextWriter()
+# atexit runs in reverse order: drain queued writes first, then close the logs
+atexit.register(_append_logs.close_all)
+atexit.register(_background_writer.shutdown)
+
 
 class TextToolsSaveTextFileSG:
     """
@@ -20,9 +381,50 @@ class TextToolsSaveTextFileSG:
             "required": {
                 "text": ("STRING", {"forceInput": True, "multiline": True}),
                 "filename_prefix": ("STRING", {"default": "ComfyUI_text"}),
-                "file_format": (["txt", "json", "md"], {"default": "txt"}),
+                "file_format": (["txt", "json", "md", "append_jsonl", "append_txt"], {
+                    "default": "txt",
+                    "tooltip": "append_* adds one record per run to a single prefix.jsonl / prefix.txt log"
+                }),
                 "pretty_json": ("BOOLEAN", {"default": True}),
             },
+            "optional": {
+                "write_mode": (["immediate", "background"], {
+                    "default": "immediate",
+                    "tooltip": "background returns right away and writes the file on a separate thread"
+                }),
+                "fsync": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Force the file to disk before it counts as written (slower)"
+                }),
+                "compression": (["none", "gzip", "xz", "bz2"], {
+                    "default": "none",
+                    "tooltip": "Compress the saved file (.gz / .xz / .bz2 is added to the name). Not used by append_* modes"
+                }),
+                "compression_level": ("INT", {
+                    "default": 6, "min": 1, "max": 9,
+                    "tooltip": "1 = fastest, 9 = smallest"
+                }),
+                "log_metadata": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "append_* only: store a timestamp and the prompt id with each record"
+                }),
+                "rotate_max_mb": ("FLOAT", {
+                    "default": 0.0, "min": 0.0, "max": 100000.0, "step": 1.0,
+                    "tooltip": "append_* only: start a new log when it would grow past this size (0 = never)"
+                }),
+                "rotate_max_records": ("INT", {
+                    "default": 0, "min": 0, "max": 100000000,
+                    "tooltip": "append_* only: start a new log after this many records (0 = never). "
+                               "append_txt keeps its count in a .records file next to the log; if the log "
+                               "is edited outside ComfyUI, counting starts again from 0"
+                }),
+                "dedup": (["off", "reuse_existing", "hardlink"], {
+                    "default": "off",
+                    "tooltip": "When the same text was saved in this folder before: reuse_existing skips the write and "
+                               "returns the earlier file, hardlink adds the new numbered name as a link to it "
+                               "(linked names share one file, so editing one edits all). Not used by append_* modes"
+                }),
+            },
         }
     
     RETURN_TYPES = ()
@@ -79,7 +481,26 @@ class TextToolsSaveTextFileSG:
         
         return filename_prefix
     
-    def save_text(self, text, filename_prefix="ComfyUI_text", file_format="txt", pretty_json=True):
+    def format_log_record(self, text, extension, log_metadata=False):
+        """
+        Build one append-mode record for a .jsonl or .txt log
+        """
+        if log_metadata:
+            timestamp = datetime.now().isoformat(timespec='seconds')
+            prompt_id = getattr(PromptServer.instance, "last_prompt_id", None)
+        if extension == "jsonl":
+            record = {"text": text}
+            if log_metadata:
+                record["timestamp"] = timestamp
+                record["prompt_id"] = prompt_id
+            return json.dumps(record, ensure_ascii=False) + "\n"
+        if log_metadata:
+            return f"# {timestamp} prompt_id={prompt_id}\n{text}\n"
+        return text + "\n"
+    
+    def save_text(self, text, filename_prefix="ComfyUI_text", file_format="txt", pretty_json=True,
+                  write_mode="immediate", fsync=False, compression="none", compression_level=6,
+                  log_metadata=False, rotate_max_mb=0.0, rotate_max_records=0, dedup="off"):
         """
         Save text content to a file with automatic numbering like SaveImage
         """
@@ -103,44 +524,101 @@ class TextToolsSaveTextFileSG:
             full_output_dir = output_dir
             subfolder = ""
         
-        # Find the next available counter number
-        counter = 1
-        while True:
-            filename = f"{filename_prefix}_{counter:05d}.{file_format}"
-            full_path = os.path.join(full_output_dir, filename)
-            if not os.path.exists(full_path):
-                break
-            counter += 1
+        # Append modes write one record per run to a single log file
+        if file_format.startswith("append_"):
+            extension = file_format[len("append_"):]
+            try:
+                record = self.format_log_record(text, extension, log_metadata)
+                args = (full_output_dir, filename_prefix, extension, record,
+                        int(rotate_max_mb * 1024 * 1024), rotate_max_records, fsync)
+                if write_mode == "background":
+                    _background_writer.submit(_append_logs.append, *args)
+                else:
+                    _append_logs.append(*args)
+                results = [{
+                    "filename": f"{filename_prefix}.{extension}",
+                    "subfolder": subfolder,
+                    "type": self.type
+                }]
+                return {"ui": {"text_files": results}}
+            except Exception as e:
+                print(f"Error saving file: {str(e)}")
+                return {"ui": {"text_files": []}}
         
         # Process content based on file format
+        full_path = None
         try:
+            extension = file_format
+            if compression != "none":
+                extension += COMPRESSION_SUFFIXES[compression]
+            
             if file_format == "json" and pretty_json:
-                # Try to parse and pretty-print JSON
-                try:
-                    json_data = json.loads(text)
-                    content_to_save = json.dumps(json_data, indent=2, ensure_ascii=False)
-                except json.JSONDecodeError:
-                    # If not valid JSON, save as-is
-                    content_to_save = text
+                # Pretty-print JSON (saved as-is if it isn't valid JSON)
+                content_to_save = pretty_json_text(text)
             else:
                 content_to_save = text
             
-            # Write the file
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content_to_save)
+            # Dedup: look for an earlier file in this folder with the same content
+            dedup_key = None
+            existing = None
+            if dedup != "off":
+                dedup_key = _saved_contents.content_key(content_to_save, extension)
+                existing = _saved_contents.find(full_output_dir, dedup_key)
+                if existing is not None and write_mode != "background":
+                    # The earlier file may still be queued; it must be on disk before this returns
+                    _background_writer.drain()
             
-            # Return info similar to SaveImage node
-            results = [{
+            if existing is not None and dedup == "reuse_existing":
+                # Nothing is written; consumers get the earlier file's name
+                return {"ui": {"text_files": [{
+                    "filename": existing,
+                    "subfolder": subfolder,
+                    "type": self.type,
+                    "dedup": "reused"
+                }]}}
+            
+            # Claim the next counter number (one past the highest existing, like SaveImage)
+            filename, full_path = _counter_index.claim(full_output_dir, filename_prefix, extension)
+            
+            # Write the file, or hand it to the background writer
+            # (append logs are left to the search index's folder scan, they change on every run)
+            write_args = (full_path, content_to_save, fsync, compression, compression_level)
+            result = {
                 "filename": filename,
                 "subfolder": subfolder,
                 "type": self.type
-            }]
+            }
+            if existing is not None:
+                # Background jobs run in order, so a queued original is written before it's linked
+                link_args = (os.path.join(full_output_dir, existing), *write_args)
+                if write_mode == "background":
+                    # Whether it becomes a link or a copy is only known once the job runs
+                    _background_writer.submit(link_or_write, *link_args)
+                    result["dedup"] = "pending"
+                    result["duplicate_of"] = existing
+                elif link_or_write(*link_args):
+                    result["dedup"] = "linked"
+                    result["duplicate_of"] = existing
+            else:
+                if dedup_key is not None:
+                    _saved_contents.reserve(full_output_dir, dedup_key, filename)
+                if write_mode == "background":
+                    _background_writer.submit(write_and_index, *write_args, dedup_key)
+                else:
+                    write_and_index(*write_args, dedup_key)
             
-            return {"ui": {"text_files": results}}
+            # Return info similar to SaveImage node
+            return {"ui": {"text_files": [result]}}
         
         except Exception as e:
             error_msg = f"Error saving file: {str(e)}"
             print(error_msg)
+            # Don't leave an empty claimed file behind
+            if full_path and os.path.exists(full_path) and os.path.getsize(full_path) == 0:
+                try:
+                    os.remove(full_path)
+                except OSError:
+                    pass
             return {"ui": {"text_files": []}}
 
 # Node registration
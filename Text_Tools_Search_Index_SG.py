@@ -0,0 +1,352 @@
+import os
+import re
+import time
+import queue
+import asyncio
+import sqlite3
+import threading
+import folder_paths
+from server import PromptServer
+from aiohttp import web
+from .Text_Tools_File_Utils_SG import is_supported_file, open_text_file
+from .Text_Tools_Load_Text_SG import TextToolsLoadTextSG
+
+# Load Text folders that are indexed, and whether their subfolders are too
+# (output_text is inside output; comfyui_root only contributes its top-level files)
+INDEXED_FOLDERS = (("output", True), ("input", True), ("temp", True), ("comfyui_root", False))
+# Only the start of a very large file is indexed
+INDEX_MAX_CHARS = 4 * 1024 * 1024
+# A search starts a background rescan if the last one finished longer ago than this (seconds)
+RESCAN_INTERVAL = 60
+# Files indexed per transaction
+COMMIT_EVERY = 200
+# Written files waiting for the indexer; beyond this they are left to a full scan
+MAX_QUEUED_FILES = 10000
+# Match markers in snippets (the frontend turns them into highlights)
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    UNIQUE (folder, name)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS file_text USING fts5(name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');
+"""
+
+_QUERY_TERM = re.compile(r'"([^"]*)"?|(\S+)')
+
+
+def build_match_query(query):
+    """
+    Turn free text into an FTS5 MATCH expression: every word (or "quoted phrase")
+    must occur, and the last word also matches as a prefix while it's being typed.
+    Returns None if there's nothing to search for.
+    """
+    terms = []
+    last_is_word = False
+    for phrase, word in _QUERY_TERM.findall(query):
+        term = (phrase or word).strip()
+        if not term:
+            continue
+        terms.append('"' + term.replace('"', '""') + '"')
+        last_is_word = bool(word)
+    if not terms:
+        return None
+    if last_is_word:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """
+    Full-text index (SQLite FTS5, in the user directory) of the text files in the
+    Load Text folders. Save Text File reports every file it writes; a background
+    scan picks up everything else, finding added, changed and removed files by
+    size and mtime. All writes happen on one indexer thread. If the database
+    can't be opened (no FTS5, read-only user directory), the index stays
+    disabled until the next restart.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        # Why the index is unavailable, None while it works
+        self.error = None
+        self._queued_files = set()
+        self._scan_queued = False
+        self._scanning = False
+        self._last_scan = 0.0
+
+    @staticmethod
+    def db_path():
+        get_user_directory = getattr(folder_paths, "get_user_directory", None)
+        base = get_user_directory() if get_user_directory else folder_paths.get_temp_directory()
+        os.makedirs(base, exist_ok=True)
+        return os.path.join(base, "text_tools_search.sqlite3")
+
+    def _connect(self):
+        # One connection per thread; WAL lets searches read while the indexer writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path(), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def folder_roots():
+        return [(folder, TextToolsLoadTextSG.get_folder_path(folder), recursive)
+                for folder, recursive in INDEXED_FOLDERS]
+
+    def _locate(self, path):
+        """
+        (folder, name relative to it with / separators) for a file path, or None
+        """
+        path = os.path.abspath(path)
+        for folder, root, recursive in self.folder_roots():
+            root = os.path.abspath(root)
+            if os.path.dirname(path) == root or (recursive and path.startswith(root + os.sep)):
+                return folder, os.path.relpath(path, root).replace(os.sep, "/")
+        return None
+
+    def _ensure_started(self):
+        # Called with self._lock held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="TextToolsSearchIndex", daemon=True)
+            self._thread.start()
+
+    def notify(self, path):
+        """
+        Index (or re-index) one file that was just written
+        """
+        with self._lock:
+            if self.error is not None or path in self._queued_files:
+                return
+            if len(self._queued_files) >= MAX_QUEUED_FILES:
+                # The indexer is far behind, one scan picks up all of these at once
+                if self._scan_queued or self._scanning:
+                    return
+                self._scan_queued = True
+                item = ("scan", None)
+            else:
+                self._queued_files.add(path)
+                item = ("file", path)
+            self._ensure_started()
+            self._queue.put(item)
+
+    def request_scan(self, force=False):
+        """
+        Queue a background scan of all indexed folders unless one ran recently
+        """
+        with self._lock:
+            if self.error is not None or self._scan_queued or self._scanning:
+                return
+            if not force and time.time() - self._last_scan < RESCAN_INTERVAL:
+                return
+            self._scan_queued = True
+            self._ensure_started()
+            self._queue.put(("scan", None))
+
+    @property
+    def scanning(self):
+        return self._scan_queued or self._scanning
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            with self._lock:
+                self.error = str(e)
+                self._queued_files.clear()
+                self._scan_queued = False
+                # Nothing will read the queue any more
+                self._queue = queue.Queue()
+            print(f"[TextTools] Search index unavailable: {str(e)}")
+            return
+        while True:
+            kind, path = self._queue.get()
+            if kind == "file":
+                # A write while this file is being indexed queues it again
+                with self._lock:
+                    self._queued_files.discard(path)
+            try:
+                if kind == "scan":
+                    with self._lock:
+                        self._scan_queued = False
+                        self._scanning = True
+                    try:
+                        self._scan(conn)
+                    finally:
+                        with self._lock:
+                            self._scanning = False
+                            self._last_scan = time.time()
+                else:
+                    location = self._locate(path)
+                    if location is not None:
+                        self._index_file(conn, location[0], location[1], path)
+                    # Batch writes that arrive together into one transaction
+                    if self._queue.empty():
+                        conn.commit()
+            except Exception as e:
+                print(f"[TextTools] Search index error: {str(e)}")
+                conn.rollback()
+
+    @staticmethod
+    def _read_for_index(path):
+        try:
+            with open_text_file(path) as f:
+                return f.read(INDEX_MAX_CHARS)
+        except Exception:
+            # Unreadable or not UTF-8: still findable by name
+            return ""
+
+    def _index_file(self, conn, folder, name, path, st=None):
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            self._remove(conn, folder, name)
+            return
+        body = self._read_for_index(path)
+        row = conn.execute("SELECT id FROM files WHERE folder = ? AND name = ?", (folder, name)).fetchone()
+        if row is None:
+            file_id = conn.execute("INSERT INTO files (folder, name, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                                   (folder, name, st.st_size, st.st_mtime_ns)).lastrowid
+        else:
+            file_id = row[0]
+            conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (st.st_size, st.st_mtime_ns, file_id))
+            conn.execute("DELETE FROM file_text WHERE rowid = ?", (file_id,))
+        conn.execute("INSERT INTO file_text (rowid, name, body) VALUES (?, ?, ?)", (file_id, name, body))
+
+    @staticmethod
+    def _remove(conn, folder, name):
+        row = conn.execute("SELECT id FROM files WHERE folder = ? AND name = ?", (folder, name)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM file_text WHERE rowid = ?", (row[0],))
+            conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    @staticmethod
+    def _walk(root, recursive):
+        found = {}
+        pending = [("", root)]
+        while pending:
+            rel_dir, dir_path = pending.pop()
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file() and is_supported_file(entry.name):
+                                st = entry.stat()
+                                found[rel_dir + entry.name] = (entry.path, st)
+                            elif recursive and entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                                pending.append((rel_dir + entry.name + "/", entry.path))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def _scan(self, conn):
+        pending_writes = 0
+        for folder, root, recursive in self.folder_roots():
+            found = self._walk(root, recursive) if os.path.isdir(root) else {}
+            known = {name: (file_id, size, mtime_ns) for file_id, name, size, mtime_ns in
+                     conn.execute("SELECT id, name, size, mtime_ns FROM files WHERE folder = ?", (folder,))}
+            for name, (file_id, _, _) in known.items():
+                if name not in found:
+                    conn.execute("DELETE FROM file_text WHERE rowid = ?", (file_id,))
+                    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                    pending_writes += 1
+            for name, (path, st) in found.items():
+                entry = known.get(name)
+                if entry is not None and entry[1] == st.st_size and entry[2] == st.st_mtime_ns:
+                    continue
+                self._index_file(conn, folder, name, path, st)
+                pending_writes += 1
+                if pending_writes >= COMMIT_EVERY:
+                    # Commit in batches so searches see progress during a long first scan
+                    conn.commit()
+                    pending_writes = 0
+        conn.commit()
+
+    def search(self, query, folder=None, limit=20, offset=0):
+        """
+        Ranked file hits for query: [{folder, file, snippet, score, size, mtime}].
+        Snippets mark matches with SNIPPET_START / SNIPPET_END.
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+        # output_text is the text subfolder of output, which is indexed as part of output
+        prefix = ""
+        if folder == "output_text":
+            folder, prefix = "output", "text/"
+        sql = ("SELECT f.folder, f.name, f.size, f.mtime_ns, "
+               "snippet(file_text, 1, ?, ?, '…', 16), bm25(file_text, 4.0, 1.0) AS score "
+               "FROM file_text JOIN files f ON f.id = file_text.rowid WHERE file_text MATCH ?")
+        params = [SNIPPET_START, SNIPPET_END, match]
+        if folder:
+            sql += " AND f.folder = ?"
+            params.append(folder)
+        if prefix:
+            sql += " AND substr(f.name, 1, ?) = ?"
+            params += [len(prefix), prefix]
+        sql += " ORDER BY score, f.mtime_ns DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        return [{
+            "folder": "output_text" if prefix else hit_folder,
+            "file": name[len(prefix):],
+            "snippet": snippet,
+            "score": round(-score, 4),
+            "size": size,
+            "mtime": mtime_ns / 1e9,
+        } for hit_folder, name, size, mtime_ns, snippet, score in self._connect().execute(sql, params)]
+
+    def count_files(self):
+        return self._connect().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+search_index = SearchIndex()
+
+
+@PromptServer.instance.routes.get("/text_tools/search")
+async def search_text_files(request):
+    """
+    Full-text search over the files in the Load Text folders.
+    Query: q, folder (optional, one of the Load Text folders), limit, offset
+    """
+    query = request.query.get("q", "")
+    folder = request.query.get("folder") or None
+    if folder is not None and folder not in TextToolsLoadTextSG.FOLDERS:
+        return web.json_response({"error": f"Unknown folder: {folder}"}, status=400)
+    try:
+        limit = min(max(1, int(request.query.get("limit", 20))), 500)
+        offset = max(0, int(request.query.get("offset", 0)))
+    except ValueError:
+        return web.json_response({"error": "limit and offset must be integers"}, status=400)
+
+    if search_index.error is not None:
+        return web.json_response({"error": f"Search index unavailable: {search_index.error}"}, status=503)
+    # Picks up files written outside Save Text File since the last scan
+    search_index.request_scan()
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, search_index.search, query, folder, limit, offset)
+        indexed_files = await loop.run_in_executor(None, search_index.count_files)
+    except sqlite3.Error as e:
+        return web.json_response({"error": f"Search failed: {str(e)}"}, status=500)
+    return web.json_response({
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        "indexed_files": indexed_files,
+        "indexing": search_index.scanning,
+    })
@@ -0,0 +1,372 @@
+import os
+import re
+import json
+import uuid
+import asyncio
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+import folder_paths
+from server import PromptServer
+from aiohttp import web
+from .Text_Tools_File_Utils_SG import TextContentCache
+
+# Texts up to this size still go to the browser in the ui message as before
+UI_INLINE_MAX_CHARS = 256 * 1024
+# Larger texts send only this much, the rest is fetched page by page
+UI_PREVIEW_CHARS = 64 * 1024
+# Largest page the /text_tools/text endpoint returns
+MAX_PAGE_CHARS = 4 * 1024 * 1024
+# Texts shorter than this are always sent whole, a delta wouldn't save anything
+DELTA_MIN_CHARS = 4 * 1024
+# Widget value standing in for a text kept in text_blobs
+BLOB_REF_PREFIX = "text_tools_blob:sha256:"
+BLOB_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class TextStore:
+    """
+    Process-wide LRU store of large node outputs, keyed by a content id (blake2b
+    of the text) and bounded by a total character budget. Viewer and Editor keep
+    their text here so the ui message only carries a preview and the id.
+    """
+
+    def __init__(self, max_chars=512 * 1024 * 1024):
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._texts = OrderedDict()
+        self._line_starts = {}
+        self._total_chars = 0
+
+    @staticmethod
+    def content_id(text):
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+    def put(self, text):
+        """
+        Store text and return its content id
+        """
+        content_id = self.content_id(text)
+        with self._lock:
+            if content_id in self._texts:
+                self._texts.move_to_end(content_id)
+                return content_id
+            self._texts[content_id] = text
+            self._total_chars += len(text)
+            while self._total_chars > self.max_chars and len(self._texts) > 1:
+                oldest, oldest_text = self._texts.popitem(last=False)
+                self._line_starts.pop(oldest, None)
+                self._total_chars -= len(oldest_text)
+        return content_id
+
+    def get(self, content_id):
+        with self._lock:
+            text = self._texts.get(content_id)
+            if text is not None:
+                self._texts.move_to_end(content_id)
+            return text
+
+    def line_starts(self, content_id, text):
+        """
+        Offset of the start of every line in a stored text, built on first use
+        """
+        with self._lock:
+            starts = self._line_starts.get(content_id)
+        if starts is None:
+            starts = array('Q', [0])
+            starts.extend(m.end() for m in re.finditer("\n", text))
+            with self._lock:
+                if content_id in self._texts:
+                    self._line_starts[content_id] = starts
+        return starts
+
+    def page(self, content_id, mode="chars", start=0, count=UI_PREVIEW_CHARS):
+        """
+        Return a page of a stored text: count characters from character offset
+        start (mode "chars"), or count lines from line start (mode "lines").
+        None if the id is unknown (e.g. evicted or the server restarted).
+        """
+        text = self.get(content_id)
+        if text is None:
+            return None
+        start = max(0, start)
+        count = max(1, count)
+        if mode == "lines":
+            starts = self.line_starts(content_id, text)
+            first = min(start, len(starts))
+            last = min(first + count, len(starts))
+            begin = starts[first] if first < len(starts) else len(text)
+            end = starts[last] if last < len(starts) else len(text)
+            end = min(end, begin + MAX_PAGE_CHARS)
+            page = {"start_line": first, "end_line": last, "total_lines": len(starts)}
+        else:
+            begin = min(start, len(text))
+            end = min(begin + min(count, MAX_PAGE_CHARS), len(text))
+            page = {}
+        page.update({"id": content_id, "start": begin, "end": end, "length": len(text), "text": text[begin:end]})
+        return page
+
+
+text_store = TextStore()
+
+
+class TextBlobStore:
+    """
+    Content-addressed store on disk for Editor texts kept out of the workflow.
+    Each text is saved once as <sha256>.txt in the user directory, and the
+    workflow and prompt only carry its reference (BLOB_REF_PREFIX + digest).
+    Resolved texts stay in an in-memory LRU, so repeated runs don't re-read them.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+
+    @staticmethod
+    def blob_dir():
+        get_user_directory = getattr(folder_paths, "get_user_directory", None)
+        base = get_user_directory() if get_user_directory else folder_paths.get_temp_directory()
+        path = os.path.join(base, "text_tools_texts")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def is_ref(value):
+        return (isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+                and BLOB_DIGEST_PATTERN.fullmatch(value, len(BLOB_REF_PREFIX)) is not None)
+
+    def path(self, digest):
+        return os.path.join(self.blob_dir(), digest + ".txt")
+
+    def save(self, text):
+        """
+        Store text (if it isn't stored already) and return its reference
+        """
+        data = text.encode('utf-8', 'surrogatepass')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.isfile(path):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._cache.put(digest, digest, text)
+        return BLOB_REF_PREFIX + digest
+
+    def load(self, digest):
+        """
+        Text stored under digest, or None if there is no such (intact) text
+        """
+        if not BLOB_DIGEST_PATTERN.fullmatch(digest):
+            return None
+        text = self._cache.get(digest, digest)
+        if text is not None:
+            return text
+        try:
+            with open(self.path(digest), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if hashlib.sha256(data).hexdigest() != digest:
+            # Removed so the next save of this text writes it again
+            print(f"[TextTools] Stored text {digest} is damaged, removing it")
+            try:
+                os.remove(self.path(digest))
+            except OSError:
+                pass
+            return None
+        text = data.decode('utf-8', 'surrogatepass')
+        self._cache.put(digest, digest, text)
+        return text
+
+    def resolve(self, value):
+        """
+        The stored text if value is a reference, otherwise value itself
+        """
+        if not self.is_ref(value):
+            return value
+        digest = value[len(BLOB_REF_PREFIX):]
+        text = self.load(digest)
+        if text is None:
+            raise FileNotFoundError(f"Stored text not found: {digest}")
+        return text
+
+
+text_blobs = TextBlobStore(TextContentCache(max_chars=256 * 1024 * 1024))
+
+
+def _utf16_len(text):
+    # Offsets sent to the browser are in JavaScript string units
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le', 'surrogatepass')) // 2
+
+
+def _common_prefix_len(a, b, block=64 * 1024):
+    limit = min(len(a), len(b))
+    # Compare whole blocks at C speed, then narrow down inside the first differing one
+    start = 0
+    while start < limit and a[start:start + block] == b[start:start + block]:
+        start += block
+    end = min(start + block, limit)
+    while start < end and a[start] == b[start]:
+        start += 1
+    return min(start, limit)
+
+
+def _common_suffix_len(a, b, limit, block=64 * 1024):
+    length = 0
+    while length < limit:
+        size = min(block, limit - length)
+        if a[len(a) - length - size:len(a) - length] != b[len(b) - length - size:len(b) - length]:
+            break
+        length += size
+    else:
+        return limit
+    end = min(length + block, limit)
+    while length < end and a[len(a) - length - 1] == b[len(b) - length - 1]:
+        length += 1
+    return length
+
+
+def text_delta(old, new):
+    """
+    Describe new as one splice of old: (start, removed text, inserted text).
+    An append is a splice at the end of old that removes nothing.
+    """
+    # Appends (growing logs, streamed output) are the common case
+    prefix = len(old) if new.startswith(old) else _common_prefix_len(old, new)
+    suffix = _common_suffix_len(old, new, min(len(old), len(new)) - prefix)
+    return prefix, old[prefix:len(old) - suffix], new[prefix:len(new) - suffix]
+
+
+class SentTexts:
+    """
+    Content id of the last text sent to each node's frontend, with a version
+    tag, so the next execution can send only what changed. The texts themselves
+    live in text_store and count against its budget; when the old text has been
+    evicted the full text is sent instead. Version tags include a per-process
+    session id, so a browser holding text from an earlier server run never
+    applies a delta to the wrong base.
+    """
+
+    def __init__(self, max_nodes=64):
+        self.max_nodes = max_nodes
+        self._lock = threading.Lock()
+        self._session = uuid.uuid4().hex[:12]
+        self._counter = 0
+        self._sent = OrderedDict()
+
+    def swap(self, node_key, content_id):
+        """
+        Record the text with content_id (None if it isn't stored) as sent to node_key;
+        returns (previous (version, content id) or None, new version)
+        """
+        with self._lock:
+            previous = self._sent.pop(node_key, None)
+            self._counter += 1
+            version = f"{self._session}-{self._counter}"
+            self._sent[node_key] = (version, content_id)
+            while len(self._sent) > self.max_nodes:
+                self._sent.popitem(last=False)
+        return previous, version
+
+
+sent_texts = SentTexts()
+
+
+def ui_text(text, node_key=None):
+    """
+    Build the ui message for a text shown by Viewer / Editor. Large texts are
+    kept in text_store; the message then holds a preview plus a text_ref with
+    the content id, length and line count, and the rest is fetched in pages.
+    With a node_key, a text that only extends or slightly changes the one sent
+    last time goes out as a text_delta splice instead.
+    """
+    if node_key is None:
+        return _ui_full_text(text)
+    # Shorter texts are always sent whole, so they don't need to be kept
+    content_id = text_store.put(text) if len(text) >= DELTA_MIN_CHARS else None
+    previous, version = sent_texts.swap(node_key, content_id)
+    old = None
+    if content_id is not None and previous is not None and previous[1] is not None:
+        old = text_store.get(previous[1])
+    if old is not None:
+        start, removed, inserted = text_delta(old, text)
+        if len(removed) + len(inserted) <= len(text) // 2:
+            # Clients without the base text fetch the whole text from the store instead
+            return {
+                "text_delta": [{
+                    "base": previous[0],
+                    "version": version,
+                    "start": _utf16_len(old[:start]),
+                    "remove": _utf16_len(removed),
+                    "insert": inserted,
+                    "id": content_id,
+                    "length": len(text),
+                    "lines": text.count("\n") + 1,
+                }],
+            }
+    ui = _ui_full_text(text, content_id)
+    ui["text_version"] = [version]
+    return ui
+
+
+def _ui_full_text(text, content_id=None):
+    if len(text) <= UI_INLINE_MAX_CHARS:
+        return {"text": [text]}
+    content_id = content_id or text_store.put(text)
+    return {
+        "text": [text[:UI_PREVIEW_CHARS]],
+        "text_ref": [{
+            "id": content_id,
+            "length": len(text),
+            "lines": text.count("\n") + 1,
+            "loaded": UI_PREVIEW_CHARS,
+        }],
+    }
+
+
+@PromptServer.instance.routes.get("/text_tools/text/{content_id}")
+async def get_text_page(request):
+    """
+    Serve a page of a stored text. Query: mode ("chars" or "lines"), start, count
+    """
+    try:
+        mode = request.query.get("mode", "chars")
+        start = int(request.query.get("start", 0))
+        count = int(request.query.get("count", UI_PREVIEW_CHARS))
+    except ValueError:
+        return web.json_response({"error": "start and count must be integers"}, status=400)
+    loop = asyncio.get_running_loop()
+    # Building the line index of a multi-MB text, slicing and encoding the page stay off the event loop
+    page = await loop.run_in_executor(None, text_store.page, request.match_info["content_id"], mode, start, count)
+    if page is None:
+        return web.json_response({"error": "Text is no longer available"}, status=404)
+    body = await loop.run_in_executor(None, json.dumps, page)
+    return web.Response(text=body, content_type="application/json")
+
+
+@PromptServer.instance.routes.post("/text_tools/blobs")
+async def post_text_blob(request):
+    """
+    Store the request body (UTF-8 text) and return its reference
+    """
+    text = await request.text()
+    try:
+        # Hashing and writing a multi-MB text stays off the event loop
+        ref = await asyncio.get_running_loop().run_in_executor(None, text_blobs.save, text)
+    except OSError as e:
+        return web.json_response({"error": f"Could not store text: {str(e)}"}, status=500)
+    return web.json_response({"ref": ref, "length": len(text)})
+
+
+@PromptServer.instance.routes.get("/text_tools/blobs/{digest}")
+async def get_text_blob(request):
+    """
+    Return a stored text as text/plain
+    """
+    text = await asyncio.get_running_loop().run_in_executor(None, text_blobs.load, request.match_info["digest"])
+    if text is None:
+        return web.json_response({"error": "Stored text not found"}, status=404)
+    return web.Response(text=text, content_type="text/plain", charset="utf-8")
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import hashlib
+import http.client
+import threading
+from urllib.parse import urlsplit, urljoin
+import folder_paths
+from server import PromptServer
+from .Text_Tools_File_Utils_SG import SUPPORTED_EXTENSIONS
+
+URL_PREFIXES = ("http://", "https://")
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+
+def is_url(path):
+    """
+    Check whether a loader path is an http(s) URL
+    """
+    return path.lower().startswith(URL_PREFIXES)
+
+
+def url_extension(url, content_type=""):
+    """
+    Supported extension for a URL's cached copy, from its path (e.g. ".json.gz") or
+    its content type; plain ".txt" otherwise
+    """
+    path = urlsplit(url).path.lower()
+    matches = [ext for ext in SUPPORTED_EXTENSIONS if path.endswith(ext)]
+    if matches:
+        return max(matches, key=len)
+    content_type = content_type.lower()
+    if "json" in content_type:
+        return ".json"
+    if "markdown" in content_type:
+        return ".md"
+    return ".txt"
+
+
+class HttpConnectionPool:
+    """
+    Keep-alive http.client connections, kept idle per (scheme, host) and reused
+    for the next request to the same server
+    """
+
+    def __init__(self, max_idle_per_host=4):
+        self.max_idle_per_host = max_idle_per_host
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def _take(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def _give(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def get(self, url, headers=None, timeout=30, max_bytes=64 * 1024 * 1024):
+        """
+        GET url, following redirects. Returns (status, lower-cased headers, body bytes).
+        Raises ValueError if the body is larger than max_bytes.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._get_once(url, headers or {}, timeout, max_bytes)
+            if status in REDIRECT_STATUSES and response_headers.get("location"):
+                url = urljoin(url, response_headers["location"])
+                continue
+            return status, response_headers, body
+        raise OSError(f"Too many redirects: {url}")
+
+    def _get_once(self, url, headers, timeout, max_bytes):
+        parts = urlsplit(url)
+        key = (parts.scheme.lower(), parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(2):
+            conn = self._take(key)
+            reused = conn is not None
+            if conn is None:
+                connection_class = http.client.HTTPSConnection if key[0] == "https" else http.client.HTTPConnection
+                conn = connection_class(parts.netloc, timeout=timeout)
+            elif conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    # The server dropped the idle keep-alive connection, retry on a fresh one
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            try:
+                length = response.getheader("Content-Length")
+                if length is not None and length.isdigit() and int(length) > max_bytes:
+                    raise ValueError(f"Response is larger than {max_bytes} bytes: {url}")
+                body = response.read(max_bytes + 1)
+                if len(body) > max_bytes:
+                    raise ValueError(f"Response is larger than {max_bytes} bytes: {url}")
+            except Exception:
+                conn.close()
+                raise
+            response_headers = {name.lower(): value for name, value in response.getheaders()}
+            # Only a fully read response leaves the connection reusable
+            if response.will_close or not response.isclosed():
+                conn.close()
+            else:
+                self._give(key, conn)
+            return response.status, response_headers, body
+        raise OSError(f"Connection failed: {url}")
+
+
+class UrlCache:
+    """
+    On-disk cache of fetched URLs. Each body is stored as a normal file with a
+    supported extension, so the loaders read it like any local file, next to a
+    .meta.json holding its ETag / Last-Modified. A cached URL is revalidated with
+    a conditional GET at most once per prompt; a 304 reuses the stored body.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked = {}
+
+    @staticmethod
+    def cache_dir():
+        get_user_directory = getattr(folder_paths, "get_user_directory", None)
+        base = get_user_directory() if get_user_directory else folder_paths.get_temp_directory()
+        path = os.path.join(base, "text_tools_url_cache")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _read_meta(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def fetch(self, url, timeout=30, max_bytes=64 * 1024 * 1024):
+        """
+        Return (local path of the cached body, meta dict) for url. If the server
+        can't be reached, a previously cached copy is returned instead.
+        """
+        generation = getattr(PromptServer.instance, "last_prompt_id", None)
+        with self._lock:
+            if generation != self._generation:
+                self._generation = generation
+                self._checked = {}
+            if url in self._checked:
+                return self._checked[url]
+
+        cache_dir = self.cache_dir()
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        meta_path = os.path.join(cache_dir, key + ".meta.json")
+        meta = self._read_meta(meta_path)
+        if meta is not None and not os.path.isfile(os.path.join(cache_dir, meta.get("file", ""))):
+            meta = None
+
+        headers = {"Accept-Encoding": "identity", "User-Agent": "ComfyUI_Text_Tools_SG"}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            status, response_headers, body = self.pool.get(url, headers, timeout, max_bytes)
+        except (OSError, http.client.HTTPException) as e:
+            if meta is None:
+                raise
+            print(f"[TextTools] Using cached copy of {url}: {str(e)}")
+            status = None
+
+        if status == 304 and meta is not None:
+            meta["checked_at"] = time.time()
+        elif status is not None:
+            if not 200 <= status < 300:
+                raise OSError(f"HTTP {status} for {url}")
+            file_name = key + url_extension(url, response_headers.get("content-type", ""))
+            self._write_atomic(os.path.join(cache_dir, file_name), body)
+            if meta is not None and meta.get("file") != file_name:
+                try:
+                    os.remove(os.path.join(cache_dir, meta["file"]))
+                except OSError:
+                    pass
+            meta = {
+                "url": url,
+                "file": file_name,
+                "etag": response_headers.get("etag"),
+                "last_modified": response_headers.get("last-modified"),
+                "digest": hashlib.blake2b(body, digest_size=16).hexdigest(),
+                "checked_at": time.time(),
+            }
+        if status is not None:
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+        result = (os.path.join(cache_dir, meta["file"]), meta)
+        with self._lock:
+            if generation == self._generation:
+                self._checked[url] = result
+        return result
+
+
+http_pool = HttpConnectionPool()
+url_cache = UrlCache(http_pool)
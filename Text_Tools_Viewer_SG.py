@@ -1,3 +1,5 @@
+from .Text_Tools_Text_Store_SG import ui_text
+
 class TextToolsViewerSG:
     CATEGORY = "text/utils"
     
@@ -6,7 +8,10 @@ class TextToolsViewerSG:
         return {
             "required": {
                 "text": ("STRING", {"default": "", "forceInput": True})
-            }
+            },
+            "hidden": {
+                "unique_id": "UNIQUE_ID",
+            },
         }
     
     RETURN_TYPES = ("STRING",)
@@ -14,11 +19,11 @@ class TextToolsViewerSG:
     FUNCTION = "texteditor"
     OUTPUT_NODE = True
     
-    def texteditor(self, text: str, **kwargs):
+    def texteditor(self, text: str, unique_id=None, **kwargs):
         return {
-            "ui": {
-                "text": [text]
-            },
+            # Large texts only send a preview, the rest is paged in from the text store;
+            # small changes to the last text sent to this node go out as a delta
+            "ui": ui_text(text, node_key=unique_id),
             "result": (text,)
         }
 
@@ -0,0 +1,60 @@
+"""
+Bytes written and wall time of Save Text File for each compression codec and
+level, plus the time to read the file back (decompressing) the way the loaders do.
+Run with: python benchmarks/compression_benchmark.py [--size-mb 8]
+"""
+import os
+import json
+import random
+import argparse
+from harness import DIRS, module, timed
+
+save_module = module("Text_Tools_Save_Text_File_SG")
+file_utils = module("Text_Tools_File_Utils_SG")
+
+CODECS = [("none", 6), ("gzip", 1), ("gzip", 6), ("gzip", 9), ("xz", 1), ("xz", 6), ("bz2", 1), ("bz2", 9)]
+
+
+def json_dump(size_mb):
+    # Records like a typical generation log: repeated keys, mixed values
+    rng = random.Random(0)
+    words = ["portrait", "landscape", "cinematic", "detailed", "soft light", "4k", "oil painting", "studio"]
+    records = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        record = {
+            "id": len(records),
+            "seed": rng.randrange(2 ** 32),
+            "prompt": ", ".join(rng.choice(words) for _ in range(rng.randint(4, 12))),
+            "steps": rng.choice([20, 25, 30]),
+            "cfg": round(rng.uniform(3, 9), 1),
+            "scores": [round(rng.random(), 4) for _ in range(8)],
+        }
+        records.append(record)
+        size += len(json.dumps(record, indent=2)) + 6
+    return json.dumps(records, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=8)
+    args = parser.parse_args()
+
+    text = json_dump(args.size_mb)
+    node = save_module.TextToolsSaveTextFileSG()
+    print(f"{len(text.encode('utf-8')):,} bytes of JSON")
+    print(f"{'codec':<6} {'lvl':>3}  {'bytes':>12}  {'ratio':>6}  {'write':>9}  {'read':>9}")
+    for codec, level in CODECS:
+        result, write_time = timed(node.save_text, text, "compression/bench", "json", False,
+                                   compression=codec, compression_level=level)
+        filename = result["ui"]["text_files"][0]["filename"]
+        path = os.path.join(DIRS["output"], "compression", filename)
+        size = os.path.getsize(path)
+        loaded, read_time = timed(file_utils.read_text_file, path)
+        assert loaded == text, f"{codec} round trip changed the text"
+        print(f"{codec:<6} {level if codec != 'none' else '-':>3}  {size:>12,}  {len(text) / size:>5.1f}x  "
+              f"{write_time * 1000:>6.0f} ms  {read_time * 1000:>6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
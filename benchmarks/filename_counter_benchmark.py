@@ -0,0 +1,51 @@
+"""
+Save Text File latency against the number of files already saved under the
+same prefix: the old os.path.exists probe loop versus the counter index
+(one os.scandir pass on the first save, then O(1) per save).
+Run with: python benchmarks/filename_counter_benchmark.py [--max-files 100000]
+"""
+import os
+import argparse
+from harness import DIRS, module, timed
+
+save_module = module("Text_Tools_Save_Text_File_SG")
+
+
+def old_next_filename(directory, prefix, extension):
+    # The probe loop save_text used before the counter index
+    counter = 1
+    while True:
+        filename = f"{prefix}_{counter:05d}.{extension}"
+        if not os.path.exists(os.path.join(directory, filename)):
+            return filename
+        counter += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-files", type=int, default=100000)
+    parser.add_argument("--saves", type=int, default=200, help="saves timed per size")
+    args = parser.parse_args()
+
+    node = save_module.TextToolsSaveTextFileSG()
+    print(f"{'existing files':>14}  {'old probe':>10}  {'first save':>10}  {'next saves':>10}")
+    for count in (10, 1000, 10000, 100000, 1000000):
+        if count > args.max_files:
+            break
+        subfolder = f"counter_{count}"
+        directory = os.path.join(DIRS["output"], subfolder)
+        os.makedirs(directory)
+        for i in range(1, count + 1):
+            open(os.path.join(directory, f"bench_{i:05d}.txt"), 'w').close()
+
+        repeats = 3 if count >= 10000 else 50
+        old_total = sum(timed(old_next_filename, directory, "bench", "txt")[1] for _ in range(repeats))
+        # The first save builds the index with one scandir pass
+        _, first = timed(node.save_text, "text", f"{subfolder}/bench")
+        later = sum(timed(node.save_text, "text", f"{subfolder}/bench")[1] for _ in range(args.saves))
+        print(f"{count:>14,}  {old_total / repeats * 1000:>7.2f} ms  {first * 1000:>7.2f} ms  "
+              f"{later / args.saves * 1000:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
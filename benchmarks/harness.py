@@ -0,0 +1,98 @@
+"""
+Shared setup for the Python benchmarks. Installs minimal stand-ins for the
+ComfyUI modules the nodes import (folder_paths and server, with every folder
+inside a temporary directory) and imports this repository as a package, so
+the benchmarks run without a ComfyUI install or a running server.
+
+Run them from anywhere with a Python that has aiohttp, e.g.
+    python benchmarks/filename_counter_benchmark.py
+"""
+import os
+import sys
+import time
+import types
+import atexit
+import shutil
+import tempfile
+import importlib
+import importlib.util
+from aiohttp import web
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "text_tools_sg"
+
+BASE_DIR = tempfile.mkdtemp(prefix="text_tools_bench_")
+atexit.register(shutil.rmtree, BASE_DIR, True)
+DIRS = {name: os.path.join(BASE_DIR, name) for name in ("input", "output", "temp", "user")}
+for _path in DIRS.values():
+    os.makedirs(_path, exist_ok=True)
+
+
+class PromptServer:
+    """
+    Stand-in for server.PromptServer: collects routes, drops websocket messages
+    """
+    instance = None
+
+    def __init__(self):
+        self.routes = web.RouteTableDef()
+        self.last_prompt_id = None
+
+    def send_sync(self, event, data, sid=None):
+        pass
+
+
+def _install_stand_ins():
+    folder_paths = types.ModuleType("folder_paths")
+    # comfyui_root is two levels above folder_paths.py
+    folder_paths.__file__ = os.path.join(BASE_DIR, "ComfyUI", "folder_paths.py")
+    folder_paths.get_input_directory = lambda: DIRS["input"]
+    folder_paths.get_output_directory = lambda: DIRS["output"]
+    folder_paths.get_temp_directory = lambda: DIRS["temp"]
+    folder_paths.get_user_directory = lambda: DIRS["user"]
+
+    server = types.ModuleType("server")
+    PromptServer.instance = PromptServer()
+    server.PromptServer = PromptServer
+
+    sys.modules["folder_paths"] = folder_paths
+    sys.modules["server"] = server
+
+
+def _load_package():
+    spec = importlib.util.spec_from_file_location(PACKAGE_NAME, os.path.join(REPO_DIR, "__init__.py"),
+                                                  submodule_search_locations=[REPO_DIR])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+_install_stand_ins()
+_load_package()
+
+
+def module(name):
+    """
+    A module of this repository, e.g. module("Text_Tools_File_Utils_SG")
+    """
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
+
+
+def timed(func, *args, **kwargs):
+    """
+    (result, seconds) for one call
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def fresh_dir(name):
+    """
+    An empty directory inside the temporary tree
+    """
+    path = os.path.join(BASE_DIR, name)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
@@ -0,0 +1,170 @@
+// Headless benchmark of the Viewer / Editor search highlight layer.
+// Times one filter update (typing a pattern) and one Prev / Next step against
+// document size, for the old full-document innerHTML rebuild and for
+// WindowedHighlighter. Run with: node benchmarks/highlight_benchmark.mjs
+//
+// The DOM is a minimal in-memory stand-in (no HTML parsing or real layout), so
+// absolute numbers are lower than in a browser, where the old path also pays for
+// parsing and laying out one <mark> per match.
+
+import { performance } from "node:perf_hooks";
+
+const LINE_HEIGHT = 21;
+const VIEWPORT_HEIGHT = 600;
+
+const countLines = (text) => {
+    let count = 0;
+    for (let i = text.indexOf("\n"); i !== -1; i = text.indexOf("\n", i + 1)) count++;
+    return count;
+};
+
+class FakeNode {
+    constructor(tag) {
+        this.tag = tag;
+        this.children = [];
+        this.parent = null;
+        this.style = {};
+        this.dataset = {};
+        this.text = "";
+        this.innerHTML = "";
+        this.top = 0;
+    }
+
+    set textContent(value) {
+        this.children = [];
+        this.text = value;
+    }
+
+    get textContent() {
+        return this.children.length ? this.children.map((child) => child.textContent).join("") : this.text;
+    }
+
+    appendChild(node) {
+        node.parent = this;
+        this.children.push(node);
+        return node;
+    }
+
+    replaceChildren(...nodes) {
+        this.children = [];
+        this.text = "";
+        for (const node of nodes) {
+            if (node.tag === "#fragment") node.children.forEach((child) => this.appendChild(child));
+            else this.appendChild(node);
+        }
+        // Stand-in for layout: one line box per newline, no wrapping
+        if (this.tag === "div") {
+            let lines = 0;
+            for (const child of this.children) {
+                child.top = lines * LINE_HEIGHT;
+                lines += countLines(child.textContent);
+            }
+        }
+    }
+
+    get offsetTop() {
+        if (this.tag !== "mark") return this.top;
+        let lines = 0;
+        for (const sibling of this.parent.children) {
+            if (sibling === this) break;
+            lines += countLines(sibling.textContent);
+        }
+        return this.parent.top + lines * LINE_HEIGHT;
+    }
+
+    querySelector(selector) {
+        const index = selector.match(/data-match-index="(\d+)"/)[1];
+        return this.children.find((child) => child.tag === "mark" && String(child.dataset.matchIndex) === index) || null;
+    }
+}
+
+globalThis.document = {
+    createElement: (tag) => new FakeNode(tag),
+    createTextNode: (text) => Object.assign(new FakeNode("#text"), { text }),
+    createDocumentFragment: () => new FakeNode("#fragment"),
+};
+
+const { WindowedHighlighter, findMatches } = await import("../web/Text_Tools_Highlight_SG.js");
+
+// Previous implementation of _applyFilter: two regex passes and a full innerHTML string
+const fullDocumentFilter = (div, text, pattern, currentMatchIndex) => {
+    const regex = new RegExp(pattern, "gi");
+    const positions = [];
+    let match;
+    while ((match = regex.exec(text)) !== null) positions.push(match.index);
+    let matchIndex = 0;
+    div.innerHTML = text.replace(new RegExp(pattern, "gi"), (found) => {
+        const color = matchIndex++ === currentMatchIndex ? "#ff6b6b" : "#ffeb3b";
+        return `<mark style="background-color: ${color}; color: #000;">${found}</mark>`;
+    });
+    return positions;
+};
+
+const makeText = (chars) => {
+    const words = ["alpha", "beta", "gamma", "delta", "error", "warning", "info", "value", "node", "prompt"];
+    const lines = [];
+    let size = 0;
+    let seed = 1;
+    while (size < chars) {
+        const count = 6 + (seed % 10);
+        const line = [];
+        for (let i = 0; i < count; i++) {
+            seed = (seed * 1103515245 + 12345) & 0x7fffffff;
+            line.push(words[seed % words.length]);
+        }
+        const joined = line.join(" ");
+        lines.push(joined);
+        size += joined.length + 1;
+    }
+    return lines.join("\n");
+};
+
+const time = (fn, runs) => {
+    fn();
+    const start = performance.now();
+    for (let i = 0; i < runs; i++) fn();
+    return (performance.now() - start) / runs;
+};
+
+const typed = ["e", "er", "err", "erro", "error"];
+const sizes = [100e3, 1e6, 10e6, 50e6];
+
+console.log("size      matches    old update  new update  new first   old nav     new nav");
+for (const size of sizes) {
+    const text = makeText(size);
+    const runs = size >= 10e6 ? 3 : 10;
+
+    const oldDiv = new FakeNode("div");
+    const oldUpdate = time(() => typed.forEach((p) => fullDocumentFilter(oldDiv, text, p, -1)), runs) / typed.length;
+    const oldNav = time(() => fullDocumentFilter(oldDiv, text, "error", 7), runs);
+
+    // First update lays the text out in blocks; later keystrokes reuse the layout
+    const firstUpdate = time(() => {
+        const highlighter = new WindowedHighlighter(new FakeNode("div"));
+        highlighter.setText(text);
+        highlighter.setMatches(findMatches(text, /e/gi));
+        highlighter.render(0, VIEWPORT_HEIGHT);
+    }, runs);
+
+    const highlighter = new WindowedHighlighter(new FakeNode("div"));
+    highlighter.setText(text);
+    const newUpdate = time(() => typed.forEach((p) => {
+        highlighter.setText(text);
+        highlighter.setMatches(findMatches(text, new RegExp(p, "gi")));
+        highlighter.render(0, VIEWPORT_HEIGHT);
+    }), runs) / typed.length;
+
+    const matches = findMatches(text, /error/gi);
+    highlighter.setMatches(matches);
+    let step = 0;
+    const newNav = time(() => {
+        const index = (step++ * 997) % matches.count;
+        highlighter.setCurrent(index);
+        const top = highlighter.matchTop(index) - VIEWPORT_HEIGHT / 2;
+        highlighter.render(Math.max(0, top), VIEWPORT_HEIGHT);
+    }, runs * 20);
+
+    const ms = (value) => `${value.toFixed(2)} ms`.padEnd(12);
+    console.log(`${(size / 1e6).toFixed(1)} MB`.padEnd(10) + String(matches.count).padEnd(11) +
+        ms(oldUpdate) + ms(newUpdate) + ms(firstUpdate) + ms(oldNav) + ms(newNav));
+}
@@ -0,0 +1,102 @@
+"""
+Peak RSS and wall time of pretty-printing JSON with the old round trip
+(json.loads + json.dumps(indent=2)) versus the streaming reindent_json, for
+files from 1 MB up. Each measurement runs in its own process, so the peak RSS
+belongs to that one call; "extra" is the peak minus the RSS with the input
+already read.
+Run with: python benchmarks/json_reindent_benchmark.py [--sizes 1 10 100 500]
+(500 MB needs about 8 GB of RAM for the round trip; a process that runs out
+of memory is reported as failed)
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import resource
+import subprocess
+from harness import fresh_dir, module, timed
+
+METHODS = ("round_trip", "reindent_json")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+def write_json(path, size_mb, rng):
+    # Compact records, as they typically arrive before pretty-printing
+    target = size_mb * 1024 * 1024
+    written = 1
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        while written < target:
+            record = json.dumps({
+                "id": rng.randrange(10 ** 9),
+                "prompt": "a portrait of a lighthouse keeper, film grain, " * rng.randint(1, 4),
+                "cfg": round(rng.uniform(3, 9), 2),
+                "tags": [rng.choice(["ok", "nsfw", "upscaled", "favourite"]) for _ in range(3)],
+                "meta": {"steps": rng.choice([20, 30]), "seed": rng.randrange(2 ** 32), "note": None},
+            }, ensure_ascii=False)
+            if written > 1:
+                f.write(",")
+            f.write(record)
+            written += len(record) + 1
+        f.write("]")
+
+
+def run_child(method, path):
+    file_utils = module("Text_Tools_File_Utils_SG")
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    base = current_rss_mb()
+    if method == "round_trip":
+        result, seconds = timed(lambda: json.dumps(json.loads(text), indent=2, ensure_ascii=False))
+    else:
+        result, seconds = timed(file_utils.reindent_json, text)
+    print(json.dumps({"seconds": seconds, "peak": peak_rss_mb(), "extra": peak_rss_mb() - base,
+                      "chars": len(result)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 100], help="file sizes in MB")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+
+    directory = fresh_dir("json_reindent")
+    rng = random.Random(0)
+    print(f"{'size':>8}  {'method':<14}  {'time':>9}  {'peak RSS':>9}  {'extra':>9}")
+    for size_mb in args.sizes:
+        path = os.path.join(directory, f"data_{size_mb:g}mb.json")
+        write_json(path, size_mb, rng)
+        results = {}
+        for method in METHODS:
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", method, path],
+                                   capture_output=True, text=True)
+            if child.returncode != 0:
+                print(f"{size_mb:>5g} MB  {method:<14}  failed (exit {child.returncode}, out of memory?)")
+                continue
+            results[method] = result = json.loads(child.stdout.strip().splitlines()[-1])
+            print(f"{size_mb:>5g} MB  {method:<14}  {result['seconds']:>7.2f} s  {result['peak']:>6.0f} MB  "
+                  f"{result['extra']:>6.0f} MB")
+        if len(results) == 2:
+            assert results["round_trip"]["chars"] == results["reindent_json"]["chars"]
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Random single-line reads through the line-offset index (read_mode "line")
+against file size, next to reading the whole file and splitting it, which is
+what a workflow had to do before. Also times building the index and loading
+it back from its .lineidx sidecar.
+Run with: python benchmarks/line_index_benchmark.py [--max-lines 1000000] [--samples 10000]
+"""
+import os
+import random
+import argparse
+from harness import fresh_dir, module, timed
+
+file_utils = module("Text_Tools_File_Utils_SG")
+
+
+def write_lines(path, count, rng):
+    words = ["a cat", "portrait of", "a lighthouse at dusk", "highly detailed", "film grain", "wide angle"]
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for i in range(count):
+            f.write(f"{i} {' '.join(rng.choice(words) for _ in range(rng.randint(1, 8)))}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-lines", type=int, default=1000000, help="10000000 for a ~0.7 GB file")
+    parser.add_argument("--samples", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    directory = fresh_dir("line_index")
+    print(f"{'lines':>11}  {'file':>8}  {'build':>9}  {'sidecar':>9}  {'per line':>9}  {'read+split':>10}")
+    for count in (1000, 100000, 1000000, 10000000):
+        if count > args.max_lines:
+            break
+        path = os.path.join(directory, f"lines_{count}.txt")
+        write_lines(path, count, rng)
+        size = os.path.getsize(path)
+
+        file_utils._line_indexes.clear()
+        _, build = timed(file_utils.get_line_index, path)
+        file_utils._line_indexes.clear()
+        _, sidecar = timed(file_utils.get_line_index, path)
+
+        picks = [rng.randrange(count) for _ in range(args.samples)]
+        for line in picks[:100]:
+            assert file_utils.read_lines(path, line).split(" ", 1)[0] == str(line)
+        _, reads = timed(lambda: [file_utils.read_lines(path, line) for line in picks])
+
+        def read_and_split(line):
+            with open(path, encoding='utf-8') as f:
+                return f.read().split("\n")[line]
+        split_samples = max(1, min(100, 10000000 // count))
+        _, splits = timed(lambda: [read_and_split(line) for line in picks[:split_samples]])
+
+        print(f"{count:>11,}  {size / 1e6:>5.1f} MB  {build * 1000:>6.1f} ms  {sidecar * 1000:>6.1f} ms  "
+              f"{reads / len(picks) * 1e6:>6.1f} us  {splits / split_samples * 1000:>7.1f} ms")
+        os.remove(path)
+        os.remove(path + ".lineidx")
+
+
+if __name__ == "__main__":
+    main()
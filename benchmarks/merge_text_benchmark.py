@@ -0,0 +1,86 @@
+"""
+Merging 10k text rows in one list execution of Merge Text / Merge Text Multi
+versus one execution per row, the way the old Merge Text (single pair per
+call) had to be used. Also checks that list mode gives the old per-row output
+for every order and insert_separator layout.
+Run with: python benchmarks/merge_text_benchmark.py [--rows 10000]
+"""
+import random
+import argparse
+from harness import module, timed
+
+merge_text = module("Text_Tools_Merge_Text_SG")
+merge_text_multi = module("Text_Tools_Merge_Text_Multi_SG")
+merge_utils = module("Text_Tools_Merge_Utils_SG")
+
+
+def old_merge_texts(order, separator, insert_separator, text1=None, text2=None):
+    # Merge Text's merge_texts before list mode: one pair per execution
+    text1 = text1 if text1 is not None else ""
+    text2 = text2 if text2 is not None else ""
+    if order == "Text1 + Text2":
+        first_text, second_text = text1, text2
+    else:
+        first_text, second_text = text2, text1
+    if insert_separator == "None":
+        merged = first_text + second_text
+    elif insert_separator == "Before":
+        merged = separator + first_text + second_text
+    elif insert_separator == "After":
+        merged = first_text + second_text + separator
+    elif insert_separator == "Between":
+        merged = first_text + separator + second_text
+    elif insert_separator == "Before and After":
+        merged = separator + first_text + second_text + separator
+    elif insert_separator == "Before and Between":
+        merged = separator + first_text + separator + second_text
+    elif insert_separator == "After and Between":
+        merged = first_text + separator + second_text + separator
+    elif insert_separator == "Before, Between, After":
+        merged = separator + first_text + separator + second_text + separator
+    else:
+        merged = first_text + second_text
+    return (merged,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    prefixes = [rng.choice(["", "photo of", "a painting of", "sks person,"]) for _ in range(args.rows)]
+    captions = [f"caption {i} " * rng.randint(0, 6) for i in range(args.rows)]
+
+    node = merge_text.TextToolsMergeTextSG()
+    for order in ("Text1 + Text2", "Text2 + Text1"):
+        for layout in merge_utils.INSERT_SEPARATOR_OPTIONS:
+            merged = node.merge_texts([order], [", "], [layout], prefixes, captions)[0]
+            assert merged == [old_merge_texts(order, ", ", layout, p, c)[0] for p, c in zip(prefixes, captions)]
+            # One side as a single text is broadcast to every row
+            merged = node.merge_texts([order], [", "], [layout], ["style"], captions)[0]
+            assert merged == [old_merge_texts(order, ", ", layout, "style", c)[0] for c in captions]
+    print(f"Merge Text list output matches the old per-row output ({args.rows:,} rows, 2 orders x 8 layouts)")
+
+    layout = "Before, Between, After"
+    _, old = timed(lambda: [old_merge_texts("Text1 + Text2", ", ", layout, p, c) for p, c in zip(prefixes, captions)])
+    _, new = timed(node.merge_texts, ["Text1 + Text2"], [", "], [layout], prefixes, captions)
+    print(f"Merge Text, {args.rows:,} pairs:        {old * 1000:7.1f} ms as {args.rows:,} calls   "
+          f"{new * 1000:7.1f} ms as one list execution")
+
+    multi = merge_text_multi.TextToolsMergeTextMultiSG()
+    columns = {f"text_{i}": [f"part {i}.{row}" for row in range(args.rows)] for i in range(1, 6)}
+    settings = dict(custom_order=["3,1,2,5,4"], input_count=[5])
+    per_row_args = [{name: [column[row]] for name, column in columns.items()} for row in range(args.rows)]
+    merge_utils.compile_merge_plan.cache_clear()
+    rows, old = timed(lambda: [multi.merge_texts(["Custom"], [", "], [layout], **settings, **row)[0][0]
+                               for row in per_row_args])
+    merged, new = timed(multi.merge_texts, ["Custom"], [", "], [layout], **settings, **columns)
+    assert merged[0] == rows
+    print(f"Merge Text Multi, {args.rows:,} x 5:    {old * 1000:7.1f} ms as {args.rows:,} calls   "
+          f"{new * 1000:7.1f} ms as one list execution")
+    print("(per-call times exclude ComfyUI's own per-node execution and caching overhead)")
+
+
+if __name__ == "__main__":
+    main()
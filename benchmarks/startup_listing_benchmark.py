@@ -0,0 +1,57 @@
+"""
+Cost of Load Text's INPUT_TYPES, which ComfyUI calls at startup, on every
+/object_info request and during validation, with a large input folder: the old
+full folder scan versus the FolderListingCache snapshot (filled in the background).
+Run with: python benchmarks/startup_listing_benchmark.py [--files 200000]
+"""
+import os
+import time
+import argparse
+from harness import DIRS, module, timed
+
+load_text = module("Text_Tools_Load_Text_SG")
+file_utils = module("Text_Tools_File_Utils_SG")
+
+
+def old_input_files(base_path):
+    # The listing INPUT_TYPES built on every call before the snapshot
+    files = []
+    for f in os.listdir(base_path):
+        full_path = os.path.join(base_path, f)
+        if os.path.isfile(full_path) and f.endswith(('.txt', '.json', '.md')):
+            files.append(f)
+    return sorted(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000)
+    args = parser.parse_args()
+
+    for i in range(args.files):
+        open(os.path.join(DIRS["input"], f"prompt_{i:07d}.txt"), 'w').close()
+    node = load_text.TextToolsLoadTextSG
+
+    old_files, old_time = timed(old_input_files, DIRS["input"])
+    types, first = timed(node.INPUT_TYPES)
+    first_count = len([f for f in types["required"]["file"][0] if f])
+    # Wait for the background refresh the first call started
+    while file_utils.folder_listings.snapshot(DIRS["input"]) is None:
+        time.sleep(0.01)
+    types, later = timed(node.INPUT_TYPES)
+    _, validate = timed(node.VALIDATE_INPUTS, "input", f"prompt_{args.files // 2:07d}.txt")
+
+    assert types["required"]["file"][0] == old_files
+    print(f"{args.files:,} files in input/")
+    rows = [
+        ("old scan, every call", old_time),
+        (f"new, first call ({first_count} files listed)", first),
+        ("new, after the background refresh", later),
+        ("VALIDATE_INPUTS (one stat)", validate),
+    ]
+    for label, seconds in rows:
+        print(f"{label:<36} {seconds * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+End-to-end check of Load Text From Anywhere's URL loading against a local
+http.server stand-in: first fetch (200), revalidation on the same keep-alive
+connection (304, same IS_CHANGED value, node not re-run), a changed file (200,
+new IS_CHANGED value), 404, the size limit and the offline fallback.
+Run with: python benchmarks/url_cache_check.py (exits with 1 if a check fails)
+"""
+import os
+import sys
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from harness import PromptServer, fresh_dir, module
+
+anywhere = module("Text_Tools_Load_Text_From_Anywhere_SG")
+
+SERVED_DIR = fresh_dir("url_served")
+# (path, status, client port) per request; one client port per connection
+requests = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves SERVED_DIR with ETag / Last-Modified and answers conditional GETs with 304
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = os.path.join(SERVED_DIR, self.path.lstrip("/"))
+        if not os.path.isfile(path):
+            self._reply(404, b"not found")
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        headers = {"ETag": etag, "Last-Modified": formatdate(os.path.getmtime(path), usegmt=True)}
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", headers)
+        else:
+            self._reply(200, body, headers)
+
+    def _reply(self, status, body, headers=None):
+        requests.append((self.path, status, self.client_address[1]))
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stops reading once a body goes over its size limit
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail and not ok else ""))
+    if not ok:
+        failures.append(name)
+
+
+def new_prompt(prompt_id):
+    # URLs are revalidated at most once per prompt
+    PromptServer.instance.last_prompt_id = prompt_id
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    url = f"{base}/prompts.txt"
+    node = anywhere.TextToolsLoadTextFromAnywhereSG()
+    with open(os.path.join(SERVED_DIR, "prompts.txt"), 'w') as f:
+        f.write("first version")
+
+    new_prompt("p1")
+    first_changed = node.IS_CHANGED(url)
+    text = node.load_file(url)[0]
+    check("first fetch returns the body", text == "first version", text)
+    check("first fetch is one 200, shared by IS_CHANGED and load_file",
+          [r[1] for r in requests] == [200], requests)
+
+    new_prompt("p2")
+    second_changed = node.IS_CHANGED(url)
+    text = node.load_file(url)[0]
+    check("next prompt revalidates with a 304", [r[1] for r in requests] == [200, 304], requests)
+    check("the 304 reuses the keep-alive connection", requests[1][2] == requests[0][2], requests)
+    check("IS_CHANGED is unchanged after a 304", second_changed == first_changed)
+    check("the cached body is returned after a 304", text == "first version", text)
+
+    with open(os.path.join(SERVED_DIR, "prompts.txt"), 'w') as f:
+        f.write("second version")
+    new_prompt("p3")
+    third_changed = node.IS_CHANGED(url)
+    text = node.load_file(url)[0]
+    check("a changed file is fetched again (200)", requests[-1][1] == 200 and len(requests) == 3, requests)
+    check("IS_CHANGED changes with the content", third_changed != second_changed)
+    check("the new body is returned", text == "second version", text)
+
+    new_prompt("p4")
+    text = node.load_file(f"{base}/missing.txt")[0]
+    check("a 404 becomes the node's error output", text.startswith("Error loading URL") and "404" in text, text)
+
+    with open(os.path.join(SERVED_DIR, "large.txt"), 'wb') as f:
+        f.write(b"x" * (2 * 1024 * 1024))
+    text = node.load_file(f"{base}/large.txt", url_max_mb=1)[0]
+    check("a body over url_max_mb is refused", text.startswith("Error loading URL") and "larger" in text, text)
+
+    server.shutdown()
+    server.server_close()
+    new_prompt("p5")
+    text = node.load_file(url, url_timeout=2)[0]
+    check("the cached copy is used while the server is down", text == "second version", text)
+    text = node.load_file(f"{base}/never_fetched.txt", url_timeout=2)[0]
+    check("an uncached URL fails while the server is down", text.startswith("Error loading URL"), text)
+
+    print(f"{len(failures)} check(s) failed" if failures else "All checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 import { app } from "../../scripts/app.js";
+import { TextPager, attachScrollPaging } from "./Text_Tools_Text_Pager_SG.js";
+import { WindowedHighlighter } from "./Text_Tools_Highlight_SG.js";
+import { TextSearcher, SEARCH_DEBOUNCE_MS, joinLines } from "./Text_Tools_Search_SG.js";
+import { BlockMarkdownRenderer } from "./Text_Tools_Markdown_Blocks_SG.js";
+import { BLOB_MIN_CHARS, fetchTextBlob, isBlobRef, knownBlobRef, storeTextBlob } from "./Text_Tools_Text_Blobs_SG.js";
 
 const loadMarkdownIt = () => {
 	return new Promise((resolve, reject) => {
@@ -216,6 +221,7 @@ app.registerExtension({
 			this.properties.max_width = this.properties.max_width ?? 750;
 			this.properties.max_height = this.properties.max_height ?? 750;
 			this.properties.font_size = this.properties.font_size ?? 14;
+			this.properties.store_text_outside = this.properties.store_text_outside ?? false;
 
 
 			// Select All button
@@ -810,6 +816,9 @@ app.registerExtension({
 
 				this._tv_original_text = "";
 				this._tv_pretty_json_text = "";
+				this._tv_pager = null;
+				this._tv_loading = null;
+				box.readOnly = !this.properties.editable;
 				this.properties.text = "";
 				this.properties.pretty_json_text = "";
 
@@ -837,8 +846,11 @@ app.registerExtension({
 					this._renderMarkdownWithHighlight();
 				}
 
-				if (this._tv_highlight_div) {
-					this._tv_highlight_div.innerHTML = '';
+				if (this._tv_searcher) {
+					this._tv_searcher.cancelAll();
+				}
+				if (this._tv_highlighter) {
+					this._tv_highlighter.clear();
 				}
 
 				this._tv_match_positions = [];
@@ -1820,12 +1832,27 @@ app.registerExtension({
 
 			textareaWrapper.appendChild(filterControls);
 
+			// Only the blocks around the visible part of the text carry <mark>s
+			const highlighter = new WindowedHighlighter(highlightDiv);
+			let highlightFrame = 0;
+			// Highlight search and line filter run in a worker, off the UI thread
+			const searcher = new TextSearcher();
+
 			// Sync scroll
 			box.addEventListener('scroll', () => {
 				highlightDiv.scrollTop = box.scrollTop;
 				highlightDiv.scrollLeft = box.scrollLeft;
+				if (highlightFrame || !highlighter.matches) return;
+				highlightFrame = requestAnimationFrame(() => {
+					highlightFrame = 0;
+					highlighter.render(box.scrollTop, box.clientHeight);
+				});
 			});
 
+			// Large texts arrive as a preview; fetch the rest as the user scrolls towards the end
+			attachScrollPaging(box, () => this._tv_pager, (chunk) => this._tv_append(chunk));
+			attachScrollPaging(markdownDiv, () => this._tv_pager, (chunk) => this._tv_append(chunk));
+
 			textareaWrapper.appendChild(highlightDiv);
 
 			// Buttons order of appearance
@@ -1847,6 +1874,8 @@ app.registerExtension({
 			this._tv_counter = counter;
 			this._tv_filter_input = filterInput;
 			this._tv_highlight_div = highlightDiv;
+			this._tv_highlighter = highlighter;
+			this._tv_searcher = searcher;
 			this._tv_highlight_controls = highlightControls;
 			this._tv_match_counter = matchCounter;
 			this._tv_match_positions = [];
@@ -1856,6 +1885,7 @@ app.registerExtension({
 
 			this._tv_original_text = "";
 			this._tv_pretty_json_text = "";
+			this._tv_pager = null;
 			this._tv_line_filter_input = lineFilterInput;
 			this._tv_filter_controls = filterControls;
 			this._tv_line_match_counter = lineMatchCounter;
@@ -1886,19 +1916,16 @@ app.registerExtension({
 			const navigateToMatch = (index) => {
 				if (this._tv_match_positions.length === 0) return;
 
+				// Reuses the match positions found by _applyFilter, only the current mark changes
 				this._tv_current_match_index = index;
-				const pos = this._tv_match_positions[index];
-
-				const textBeforeMatch = box.value.substring(0, pos);
-				const lineNumber = textBeforeMatch.split('\n').length - 1;
-				const lineHeight = parseFloat(getComputedStyle(box).lineHeight);
-				const scrollPosition = lineNumber * lineHeight;
+				highlighter.setCurrent(index);
 
-				box.scrollTop = scrollPosition - (box.clientHeight / 2);
+				box.scrollTop = highlighter.matchTop(index) - (box.clientHeight / 2);
 				highlightDiv.scrollTop = box.scrollTop;
+				highlightDiv.scrollLeft = box.scrollLeft;
+				highlighter.render(box.scrollTop, box.clientHeight);
 
 				matchCounter.textContent = `${index + 1} / ${this._tv_match_positions.length}`;
-				this._applyFilter(index);
 			};
 
 			// Navigation for markdown mode
@@ -2012,10 +2039,11 @@ app.registerExtension({
 				if (this.properties.markdown_mode) {
 					this._renderMarkdownWithHighlight();
 				} else {
-					this._applyFilter();
-					if (this._tv_match_positions.length > 0) {
-						this._tv_navigate_to_match(0);
-					}
+					this._applyFilter(-1, SEARCH_DEBOUNCE_MS).then((done) => {
+						if (done && this._tv_match_positions.length > 0) {
+							this._tv_navigate_to_match(0);
+						}
+					});
 				}
 			};
 
@@ -2023,13 +2051,30 @@ app.registerExtension({
 				if (this.properties.markdown_mode) {
 					this._renderMarkdownWithHighlight();
 				} else {
-					this._applyLineFilter();
+					this._applyLineFilter(SEARCH_DEBOUNCE_MS);
 				}
 			};
 
 			// Set text helper
-			this._tv_set = (v) => {
+			this._tv_set = (v, ref = null) => {
 				const text = typeof v === "string" ? v : (Array.isArray(v) ? v.join("\n") : "");
+				if (isBlobRef(text)) {
+					// The workflow only holds a reference, the text itself is fetched from the server
+					const textWidget = this.widgets?.find(w => w.name === "text");
+					if (textWidget) textWidget.value = text;
+					box.value = "Loading stored text...";
+					fetchTextBlob(text).then((stored) => {
+						if (!textWidget || textWidget.value === text) this._tv_set(stored);
+					}).catch((e) => {
+						box.value = `Error loading stored text: ${e.message}`;
+					});
+					return;
+				}
+				// ref: the full text is kept on the server and v is only its start
+				const pager = ref ? new TextPager(ref) : null;
+				this._tv_pager = pager;
+				this._tv_loading = null;
+				box.readOnly = !this.properties.editable;
 				this._tv_original_text = text;
 				box.value = text;
 			this._tv_original_text = text;
@@ -2044,12 +2089,64 @@ app.registerExtension({
 
 				this._updateCounter();
 
+				if (pager && !pager.complete) {
+					// The text widget keeps its previous value until the whole text is here,
+					// so a save or queue in the meantime never stores just the preview
+					this._tv_loading = this._tv_load_rest(pager);
+					return;
+				}
 				const textWidget = this.widgets?.find(w => w.name === "text");
 				if (textWidget) {
 					textWidget.value = text;
 				}
 			};
 
+			// Fetch the rest of a large text right away; editing waits until it is complete
+			this._tv_load_rest = async (pager) => {
+				box.readOnly = true;
+				const loaded = await pager.loadAll((chunk) => {
+					if (this._tv_pager === pager) this._tv_append(chunk);
+				});
+				// Replaced by another text in the meantime, which sets up the box itself
+				if (this._tv_pager !== pager) return;
+				this._tv_loading = null;
+				box.readOnly = !this.properties.editable;
+				if (!loaded) {
+					// Evicted or unreachable: show the previous text again rather than let the preview be edited
+					console.warn("[TextTools] The rest of the text could not be loaded, the Editor keeps its previous text");
+					this._tv_set(this.widgets?.find(w => w.name === "text")?.value ?? "");
+				}
+			};
+
+			// Append the next fetched page of a large text
+			this._tv_append = (chunk) => {
+				this._tv_original_text += chunk;
+
+				if (this.properties.markdown_mode) {
+					const scrollTop = markdownDiv.scrollTop;
+					box.value = this._tv_original_text;
+					this._renderMarkdownWithHighlight();
+					markdownDiv.scrollTop = scrollTop;
+				} else if (this.properties.text_filter || this.properties.line_filter) {
+					const scrollTop = box.scrollTop;
+					this._applyFilter();
+					this._applyLineFilter();
+					box.scrollTop = scrollTop;
+					highlightDiv.scrollTop = scrollTop;
+				} else {
+					const scrollTop = box.scrollTop;
+					box.value += chunk;
+					box.scrollTop = scrollTop;
+				}
+				this._updateCounter();
+
+				const pager = this._tv_pager;
+				const textWidget = this.widgets?.find(w => w.name === "text");
+				if (textWidget && (!pager || pager.loaded >= pager.length)) {
+					textWidget.value = this._tv_original_text;
+				}
+			};
+
 			// Highlight text in rendered markdown HTML
 			this._highlightMarkdownText = (searchText) => {
 				if (!searchText || !this._tv_markdown_div) return;
@@ -2167,8 +2264,12 @@ app.registerExtension({
 				}
 
 				try {
-					const html = this._md.render(textToRender);
-					this._tv_markdown_div.innerHTML = html;
+					// Only blocks whose source changed are rendered again and swapped in the DOM;
+					// long documents render the visible blocks, unless every match has to be marked
+					if (!this._tv_markdown_blocks) {
+						this._tv_markdown_blocks = new BlockMarkdownRenderer(this._md, this._tv_markdown_div);
+					}
+					this._tv_markdown_blocks.render(textToRender, { allBlocks: Boolean(filterValue && this.properties.text_filter) });
 
 					// Apply text highlighting if active
 					if (filterValue && this.properties.text_filter) {
@@ -2180,6 +2281,7 @@ app.registerExtension({
 
 				} catch (e) {
 					console.error("Markdown render error:", e);
+					if (this._tv_markdown_blocks) this._tv_markdown_blocks.reset();
 					this._tv_markdown_div.innerHTML = "Error rendering markdown";
 				}
 			};
@@ -2258,91 +2360,117 @@ app.registerExtension({
 				const words = text.trim() ? text.trim().split(/\s+/).length : 0;
 				const lines = text ? text.split('\n').length : 0;
 				counter.textContent = `${chars} chars | ${words} words | ${lines} lines`;
+				const pager = this._tv_pager;
+				if (pager && !pager.complete) {
+					const loaded = Math.floor(100 * pager.loaded / pager.length);
+					counter.textContent += ` | ${loaded}% of ${pager.length} chars, ${pager.lines} lines loaded`;
+				}
 			};
 
-			// Apply filter
-			this._applyFilter = (currentMatchIndex = -1) => {
+			// Apply filter (the search runs in the worker; resolves true once all matches are shown)
+			this._applyFilter = (currentMatchIndex = -1, delay = 0) => {
 				const filterValue = filterInput.value;
 
-				if (!this.properties.line_filter) {
+				if (!this.properties.line_filter && box.value !== this._tv_original_text) {
 					box.value = this._tv_original_text;
 				}
 
 				this._updateCounter();
 
-				if (!filterValue || !this.properties.text_filter) {
-					highlightDiv.innerHTML = '';
+				const clearHighlight = () => {
+					searcher.cancel("highlight");
+					highlighter.clear();
 					this._tv_match_positions = [];
 					matchCounter.textContent = "0 / 0";
-					return;
+					return false;
+				};
+
+				if (!filterValue || !this.properties.text_filter) {
+					return Promise.resolve(clearHighlight());
 				}
 
 				try {
-					const regex = new RegExp(filterValue, 'gi');
-					const text = box.value;
-
-					this._tv_match_positions = [];
-					let match;
-					while ((match = regex.exec(text)) !== null) {
-						this._tv_match_positions.push(match.index);
-					}
-
-					if (currentMatchIndex === -1) {
-						matchCounter.textContent = `0 / ${this._tv_match_positions.length}`;
-					}
-
-					let matchIndex = 0;
-					const highlightedText = text.replace(new RegExp(filterValue, 'gi'), (match) => {
-						const isCurrentMatch = matchIndex === currentMatchIndex;
-						matchIndex++;
+					new RegExp(filterValue, 'gi');
+				} catch (e) {
+					console.warn("Invalid regex");
+					return Promise.resolve(clearHighlight());
+				}
 
-						if (isCurrentMatch) {
-							return `<mark style="background-color: #ff6b6b; color: #000;">${match}</mark>`;
-						} else {
-							return `<mark style="background-color: #ffeb3b; color: #000;">${match}</mark>`;
-						}
-					});
+				const text = box.value;
+				let first = true;
 
-					highlightDiv.innerHTML = highlightedText;
+				// Partial results show up as they stream in; the positions drive the marks, Prev / Next and the counter
+				const showMatches = (result) => {
+					this._tv_match_positions = result.starts;
 					highlightDiv.style.fontSize = box.style.fontSize;
+					highlighter.setText(text);
+					highlighter.setMatches(result, first ? currentMatchIndex : highlighter.current);
+					first = false;
 					highlightDiv.scrollTop = box.scrollTop;
+					highlightDiv.scrollLeft = box.scrollLeft;
+					highlighter.render(box.scrollTop, box.clientHeight);
+					const total = `${result.count}${result.truncated ? "+" : result.complete ? "" : "…"}`;
+					matchCounter.textContent = `${highlighter.current === -1 ? 0 : highlighter.current + 1} / ${total}`;
+				};
 
-				} catch (e) {
-					console.warn("Invalid regex");
-					this._tv_match_positions = [];
-					matchCounter.textContent = "0 / 0";
-				}
+				return searcher.search("highlight", text, { mode: "matches", pattern: filterValue, flags: 'gi', delay }, showMatches)
+					.then((result) => {
+						if (!result) return false;
+						if (result.error) {
+							console.warn("[TextTools] Highlight search failed:", result.error);
+							clearHighlight();
+							matchCounter.textContent = "stopped";
+							return false;
+						}
+						return true;
+					});
 			};
 
-			// Apply line filter
-			this._applyLineFilter = () => {
+			// Apply line filter (matching lines are found in the worker)
+			this._applyLineFilter = (delay = 0) => {
 				const filterValue = this._tv_line_filter_input.value;
 
-				if (!filterValue || !this.properties.line_filter) {
+				const showAllLines = () => {
+					searcher.cancel("lines");
 					box.value = this._tv_original_text;
 					this._tv_line_match_counter.textContent = "0 lines";
 					this._updateCounter();
-					return;
+					return false;
+				};
+
+				if (!filterValue || !this.properties.line_filter) {
+					return Promise.resolve(showAllLines());
 				}
 
 				try {
-					const regex = new RegExp(filterValue, 'i');
-					
-			const sourceText = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
-			const lines = sourceText.splitsplit('\n');
-					const matchedLines = lines.filter(line => regex.test(line));
-
-					box.value = matchedLines.join('\n');
-					this._tv_line_match_counter.textContent = `${matchedLines.length} lines`;
-					this._updateCounter();
-
-					if (this.properties.text_filter) {
-						this._applyFilter();
-					}
-
+					new RegExp(filterValue, 'i');
 				} catch (e) {
 					console.warn("Invalid regex");
+					return Promise.resolve(false);
 				}
+
+				const sourceText = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
+				const showCount = (result) => {
+					const suffix = result.truncated ? "+" : result.complete ? "" : "…";
+					this._tv_line_match_counter.textContent = `${result.count}${suffix} lines`;
+				};
+
+				return searcher.search("lines", sourceText, { mode: "lines", pattern: filterValue, flags: 'i', delay }, showCount)
+					.then((result) => {
+						if (!result) return false;
+						if (result.error) {
+							console.warn("[TextTools] Line filter failed:", result.error);
+							this._tv_line_match_counter.textContent = "stopped";
+							return false;
+						}
+						box.value = joinLines(sourceText, result);
+						this._updateCounter();
+
+						if (this.properties.text_filter) {
+							this._applyFilter();
+						}
+						return true;
+					});
 			};
 
 			// Sync on input
@@ -2361,14 +2489,32 @@ app.registerExtension({
 			});
 
 			// Add DOM widget
-			this.addDOMWidget("textDisplay", "customtext", textareaWrapper, {
-				getValue: () => box.value,
+			const displayWidget = this.addDOMWidget("textDisplay", "customtext", textareaWrapper, {
+				// The box may only show a preview or a filtered view, the text widget has the text
+				getValue: () => this.widgets?.find(w => w.name === "text")?.value ?? box.value,
 				setValue: (v) => {
 					box.value = v;
 					this._tv_set(v);
 				}
 			});
 
+			// With store_text_outside, the prompt carries a reference to a large text instead of the text
+			const serializeText = async () => {
+				// A large text still arriving from the server is completed first
+				if (this._tv_loading) await this._tv_loading;
+				const text = this.widgets?.find(w => w.name === "text")?.value ?? box.value;
+				if (!this.properties.store_text_outside || isBlobRef(text) || text.length < BLOB_MIN_CHARS) return text;
+				try {
+					return await storeTextBlob(text);
+				} catch (e) {
+					console.warn("[TextTools] Could not store the text outside the workflow:", e);
+					return text;
+				}
+			};
+			const hiddenTextWidget = this.widgets?.find(w => w.name === "text");
+			if (hiddenTextWidget) hiddenTextWidget.serializeValue = serializeText;
+			if (displayWidget) displayWidget.serializeValue = serializeText;
+
 			// Initial setup
 			this._tv_set(this.properties?.text ?? "");
 			this._applyTheme(this.properties.theme);
@@ -2398,7 +2544,7 @@ app.registerExtension({
 				
 				// Only update if input is connected
 				if (isInputConnected) {
-					this._tv_set(incomingText);
+					this._tv_set(incomingText, message.text_ref?.[0] ?? null);
 				}
 			}
 		};
@@ -2410,8 +2556,12 @@ app.registerExtension({
 
 			const textWidget = this.widgets?.find(w => w.name === "text");
 			if (textWidget && this._tv_box) {
-				this._tv_box.value = textWidget.value || "";
-				this._updateCounter?.();
+				if (isBlobRef(textWidget.value)) {
+					this._tv_set(textWidget.value);
+				} else {
+					this._tv_box.value = textWidget.value || "";
+					this._updateCounter?.();
+				}
 			}
 
 			// Restore font size from saved properties
@@ -2458,9 +2608,43 @@ app.registerExtension({
 					data.properties.text_filter = this.properties.text_filter;
 					data.properties.line_filter = this.properties.line_filter;
 					data.properties.pretty_json_mode = this.properties.pretty_json_mode;
+					data.properties.store_text_outside = this.properties.store_text_outside;
+				}
+
+				// Once a large text is stored on the server, the workflow keeps only its reference
+				const text = this.widgets?.find(w => w.name === "text")?.value;
+				if (this.properties?.store_text_outside && typeof text === "string" && text.length >= BLOB_MIN_CHARS
+					&& Array.isArray(data.widgets_values)) {
+					const ref = knownBlobRef(text);
+					if (ref) {
+						const shown = this._tv_box?.value;
+						data.widgets_values = data.widgets_values.map(v => (v === text || (v === shown && v.length >= BLOB_MIN_CHARS)) ? ref : v);
+					} else {
+						// Stored in the background, the next save of the workflow uses the reference
+						storeTextBlob(text).catch(e => console.warn("[TextTools] Could not store the text outside the workflow:", e));
+					}
 				}
 				
 				return data;
 			};
+
+			// Right-click option to keep large texts out of the workflow
+			const origGetExtraMenuOptions = nodeType.prototype.getExtraMenuOptions;
+			nodeType.prototype.getExtraMenuOptions = function(_, options) {
+				origGetExtraMenuOptions?.apply(this, arguments);
+				options.push({
+					content: this.properties?.store_text_outside
+						? "Keep Large Text in Workflow"
+						: "Store Large Text Outside Workflow",
+					callback: () => {
+						this.properties.store_text_outside = !this.properties.store_text_outside;
+						const text = this.widgets?.find(w => w.name === "text")?.value;
+						if (!this.properties.store_text_outside && isBlobRef(text)) {
+							// Bring the text back into the workflow
+							fetchTextBlob(text).then(stored => this._tv_set?.(stored)).catch(() => {});
+						}
+					},
+				});
+			};
 	},
 });
@@ -0,0 +1,199 @@
+// Windowed highlight layer for the Viewer / Editor search overlay.
+// The overlay holds the text as one <span> per block of lines; only the blocks
+// around the visible part of the textarea get <mark> elements.
+
+const LINES_PER_BLOCK = 200;
+const OVERSCAN_BLOCKS = 1;
+const MARK_COLOR = "#ffeb3b";
+const CURRENT_MARK_COLOR = "#ff6b6b";
+
+// Offset of the first character of every line
+export function computeLineStarts(text) {
+    let count = 1;
+    for (let i = text.indexOf("\n"); i !== -1; i = text.indexOf("\n", i + 1)) count++;
+    const starts = new Uint32Array(count);
+    let line = 1;
+    for (let i = text.indexOf("\n"); i !== -1; i = text.indexOf("\n", i + 1)) starts[line++] = i + 1;
+    return starts;
+}
+
+// Index of the last entry of a sorted array that is <= value
+export function lastAtOrBelow(sorted, value, count = sorted.length) {
+    let lo = 0;
+    let hi = count - 1;
+    while (lo < hi) {
+        const mid = (lo + hi + 1) >> 1;
+        if (sorted[mid] <= value) lo = mid;
+        else hi = mid - 1;
+    }
+    return lo;
+}
+
+// Line number (0-based) of a character offset
+export function lineOfOffset(lineStarts, offset) {
+    return lastAtOrBelow(lineStarts, offset);
+}
+
+// Start / end offsets of every match of a global regex, in typed arrays
+export function findMatches(text, regex) {
+    let starts = new Uint32Array(1024);
+    let ends = new Uint32Array(1024);
+    let count = 0;
+    let match;
+    regex.lastIndex = 0;
+    while ((match = regex.exec(text)) !== null) {
+        if (match[0].length === 0) {
+            // Zero-length matches can't be highlighted; step over them so exec doesn't loop forever
+            regex.lastIndex++;
+            continue;
+        }
+        if (count === starts.length) {
+            const grownStarts = new Uint32Array(count * 2);
+            const grownEnds = new Uint32Array(count * 2);
+            grownStarts.set(starts);
+            grownEnds.set(ends);
+            starts = grownStarts;
+            ends = grownEnds;
+        }
+        starts[count] = match.index;
+        ends[count] = match.index + match[0].length;
+        count++;
+    }
+    return { starts: starts.subarray(0, count), ends: ends.subarray(0, count), count };
+}
+
+export class WindowedHighlighter {
+    constructor(container) {
+        this.container = container;
+        this.text = null;
+        this.lineStarts = null;
+        this.blocks = [];
+        this.blockStarts = new Uint32Array(0);
+        this.matches = null;
+        this.current = -1;
+        this.marked = new Set();
+    }
+
+    // Lay out the text as plain blocks (kept while only the pattern changes)
+    setText(text) {
+        if (text === this.text) return;
+        this.text = text;
+        this.lineStarts = computeLineStarts(text);
+        const lineCount = this.lineStarts.length;
+        const fragment = document.createDocumentFragment();
+        this.blocks = [];
+        this.blockStarts = new Uint32Array(Math.ceil(lineCount / LINES_PER_BLOCK));
+        for (let line = 0; line < lineCount; line += LINES_PER_BLOCK) {
+            const start = this.lineStarts[line];
+            const endLine = line + LINES_PER_BLOCK;
+            const end = endLine < lineCount ? this.lineStarts[endLine] : text.length;
+            const span = document.createElement("span");
+            span.textContent = text.slice(start, end);
+            fragment.appendChild(span);
+            this.blockStarts[this.blocks.length] = start;
+            this.blocks.push({ span, start, end });
+        }
+        this.container.replaceChildren(fragment);
+        this.marked.clear();
+    }
+
+    setMatches(matches, current = -1) {
+        this.matches = matches;
+        this.current = current;
+        // Marked blocks show the old matches, re-mark them on the next render
+        for (const index of this.marked) this._renderBlock(index);
+    }
+
+    setCurrent(index) {
+        const previous = this.current;
+        this.current = index;
+        for (const matchIndex of [previous, index]) {
+            if (matchIndex < 0 || !this.matches || matchIndex >= this.matches.count) continue;
+            const block = this.blockOfOffset(this.matches.starts[matchIndex]);
+            if (this.marked.has(block)) this._renderBlock(block);
+        }
+    }
+
+    clear() {
+        this.container.replaceChildren();
+        this.text = null;
+        this.lineStarts = null;
+        this.blocks = [];
+        this.blockStarts = new Uint32Array(0);
+        this.matches = null;
+        this.current = -1;
+        this.marked.clear();
+    }
+
+    blockOfOffset(offset) {
+        return lastAtOrBelow(this.blockStarts, offset, this.blocks.length);
+    }
+
+    // Mark the blocks overlapping [scrollTop, scrollTop + height] (plus overscan), unmark the rest
+    render(scrollTop, height) {
+        const blocks = this.blocks;
+        if (!blocks.length || !this.matches) return;
+        let lo = 0;
+        let hi = blocks.length - 1;
+        while (lo < hi) {
+            const mid = (lo + hi + 1) >> 1;
+            if (blocks[mid].span.offsetTop <= scrollTop) lo = mid;
+            else hi = mid - 1;
+        }
+        let last = lo;
+        while (last + 1 < blocks.length && blocks[last + 1].span.offsetTop < scrollTop + height) last++;
+        const first = Math.max(0, lo - OVERSCAN_BLOCKS);
+        last = Math.min(blocks.length - 1, last + OVERSCAN_BLOCKS);
+
+        for (const index of [...this.marked]) {
+            if (index < first || index > last) {
+                const block = blocks[index];
+                block.span.textContent = this.text.slice(block.start, block.end);
+                this.marked.delete(index);
+            }
+        }
+        for (let index = first; index <= last; index++) {
+            if (!this.marked.has(index)) this._renderBlock(index);
+        }
+    }
+
+    // Offset from the top of the overlay to a match (its block is marked if needed)
+    matchTop(matchIndex) {
+        if (!this.matches || matchIndex < 0 || matchIndex >= this.matches.count) return 0;
+        const block = this.blockOfOffset(this.matches.starts[matchIndex]);
+        if (!this.marked.has(block)) this._renderBlock(block);
+        const mark = this.blocks[block].span.querySelector(`mark[data-match-index="${matchIndex}"]`);
+        return mark ? mark.offsetTop : this.blocks[block].span.offsetTop;
+    }
+
+    _renderBlock(index) {
+        const { span, start, end } = this.blocks[index];
+        const matches = this.matches;
+        const text = this.text;
+        this.marked.add(index);
+        if (!matches || matches.count === 0) {
+            span.textContent = text.slice(start, end);
+            return;
+        }
+        const fragment = document.createDocumentFragment();
+        let pos = start;
+        // First match ending inside or after this block
+        let i = matches.count && matches.ends[matches.count - 1] > start
+            ? lastAtOrBelow(matches.ends, start, matches.count) : matches.count;
+        if (i < matches.count && matches.ends[i] <= start) i++;
+        for (; i < matches.count && matches.starts[i] < end; i++) {
+            const matchStart = Math.max(matches.starts[i], start);
+            const matchEnd = Math.min(matches.ends[i], end);
+            if (matchStart > pos) fragment.appendChild(document.createTextNode(text.slice(pos, matchStart)));
+            const mark = document.createElement("mark");
+            mark.textContent = text.slice(matchStart, matchEnd);
+            mark.dataset.matchIndex = i;
+            mark.style.backgroundColor = i === this.current ? CURRENT_MARK_COLOR : MARK_COLOR;
+            mark.style.color = "#000";
+            fragment.appendChild(mark);
+            pos = matchEnd;
+        }
+        if (pos < end) fragment.appendChild(document.createTextNode(text.slice(pos, end)));
+        span.replaceChildren(fragment);
+    }
+}
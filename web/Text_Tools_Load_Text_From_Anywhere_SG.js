@@ -44,7 +44,8 @@ app.registerExtension({
                 // Set the node's initial size
                 const nodeWidth = 360; 
                 const nodeHeight = 100; 
-                this.setSize([nodeWidth, nodeHeight]);
+                // Grow past the default height so the read mode widgets fit
+                this.setSize([nodeWidth, Math.max(nodeHeight, this.computeSize()[1])]);
                 
                 // Store the original onResize
                 const originalOnResize = this.onResize;
@@ -1,6 +1,125 @@
 import { app } from "../../scripts/app.js";
 import { api } from "../../scripts/api.js";
 
+// One shared file list per folder. It is fetched once, no matter how many
+// nodes show the folder, and kept current by server push events.
+const folderLists = new Map();
+
+// Wait before each retry of a failed list fetch (the last one repeats)
+const RETRY_DELAYS_MS = [1000, 5000, 15000, 60000];
+
+// Most content search hits shown in the file list
+const SEARCH_RESULT_LIMIT = 200;
+
+// Matches in search snippets are wrapped in \x02 ... \x03
+const formatSnippet = (snippet) => snippet
+    .replace(/\x02/g, "«")
+    .replace(/\x03/g, "»")
+    .replace(/\s+/g, " ")
+    .trim();
+
+const fetchFolderFiles = async (folder, entry) => {
+    try {
+        const response = await api.fetchApi("/text_file_loader/files", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ folder: folder, subscribe: true })
+        });
+        
+        if (!response.ok) {
+            console.error("[TextToolsLoadTextSG] Response not OK:", response.status);
+            scheduleRetry(folder, entry);
+            return false;
+        }
+        
+        const data = await response.json();
+        entry.files = data.files || [];
+        entry.failures = 0;
+        return true;
+    } catch (error) {
+        scheduleRetry(folder, entry);
+        return false;
+    }
+};
+
+// Fetch (and subscribe to) a folder's list, then show it on every node displaying the folder
+const refreshFolderList = (folder, entry) => {
+    clearTimeout(entry.retryTimer);
+    entry.retryTimer = null;
+    entry.ready = fetchFolderFiles(folder, entry).then((ok) => {
+        if (ok) {
+            for (const node of entry.nodes) {
+                node.applyTextToolsFileList?.(true);
+            }
+        }
+    });
+    return entry.ready;
+};
+
+// A failed fetch keeps the entry, so the nodes registered on it get the list
+// once a retry succeeds. Entries no node shows any more are dropped instead.
+const scheduleRetry = (folder, entry) => {
+    const delay = RETRY_DELAYS_MS[Math.min(entry.failures, RETRY_DELAYS_MS.length - 1)];
+    entry.failures++;
+    clearTimeout(entry.retryTimer);
+    entry.retryTimer = setTimeout(() => {
+        entry.retryTimer = null;
+        if (folderLists.get(folder) !== entry) {
+            return;
+        }
+        if (entry.nodes.size > 0) {
+            refreshFolderList(folder, entry);
+        } else {
+            folderLists.delete(folder);
+        }
+    }, delay);
+};
+
+const getFolderList = (folder) => {
+    let entry = folderLists.get(folder);
+    if (!entry) {
+        entry = { files: [], nodes: new Set(), ready: null, failures: 0, retryTimer: null };
+        folderLists.set(folder, entry);
+        refreshFolderList(folder, entry);
+    } else if (entry.failures > 0) {
+        // Selected again after a failed fetch: retry now rather than on the timer
+        refreshFolderList(folder, entry);
+    }
+    return entry;
+};
+
+// Subscriptions live in the server process and are gone after a restart or a
+// dropped websocket, so fetch every list again (which subscribes again)
+api.addEventListener("reconnected", () => {
+    for (const [folder, entry] of folderLists) {
+        if (entry.nodes.size > 0) {
+            refreshFolderList(folder, entry);
+        } else {
+            clearTimeout(entry.retryTimer);
+            folderLists.delete(folder);
+        }
+    }
+});
+
+api.addEventListener("text_tools_folder_changed", (event) => {
+    const { folder, added, removed } = event.detail || {};
+    const entry = folderLists.get(folder);
+    if (!entry) {
+        return;
+    }
+    
+    const removedSet = new Set(removed || []);
+    let files = entry.files.filter(f => !removedSet.has(f));
+    if (added && added.length > 0) {
+        files = files.concat(added).sort();
+    }
+    entry.files = files;
+    
+    for (const node of entry.nodes) {
+        node.applyTextToolsFileList?.(true);
+    }
+});
+
 app.registerExtension({
     name: "TextToolsLoadTextSG.DynamicFileList",
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
@@ -49,53 +168,126 @@ app.registerExtension({
                     };
                 }
                 
-                // File list update function
-                const updateFileList = async (folder) => {
+                // Show the shared list for the current folder. keepValue keeps the
+                // selected file (e.g. from a loaded workflow) while it still exists.
+                let currentFolder = null;
+                this.applyTextToolsFileList = (keepValue) => {
+                    if (searchQuery) {
+                        searchContents(keepValue);
+                        return;
+                    }
+                    const entry = folderLists.get(currentFolder);
+                    const files = entry ? entry.files : [];
+                    
+                    fileWidget.options = fileWidget.options || {};
+                    fileWidget.options.values = files;
+                    
+                    if (keepValue && files.includes(fileWidget.value)) {
+                        return;
+                    }
+                    fileWidget.value = files.length > 0 ? files[0] : "";
+                };
+                
+                // Content search: while search_contents has text, the file list holds the
+                // files in this folder whose text matches, best match first
+                let searchQuery = "";
+                let searchSerial = 0;
+                const infoDefault = infoWidget ? infoWidget.value : "";
+                const showSearchInfo = (text) => {
+                    if (infoWidget) {
+                        infoWidget.value = text;
+                    }
+                };
+                
+                const searchContents = async (keepValue) => {
+                    const serial = ++searchSerial;
+                    const query = searchQuery;
+                    const params = new URLSearchParams({ q: query, folder: currentFolder, limit: String(SEARCH_RESULT_LIMIT) });
+                    let data;
                     try {
-                        const response = await api.fetchApi("/text_file_loader/files", {
-                            method: "POST",
-                            headers: { "Content-Type": "application/json" },
-                            body: JSON.stringify({ folder: folder })
-                        });
-                        
+                        const response = await api.fetchApi(`/text_tools/search?${params}`);
+                        data = await response.json();
                         if (!response.ok) {
-                            console.error("[TextToolsLoadTextSG] Response not OK:", response.status);
-                            return;
+                            throw new Error(data.error || `HTTP ${response.status}`);
                         }
-                        
-                        const data = await response.json();
-                        console.log("[TextToolsLoadTextSG] Received files:", data.files);
-                        
-                        fileWidget.options = fileWidget.options || {};
-                        fileWidget.options.values = data.files || [];
-                        
-                        if (fileWidget.options.values.length > 0) {
-                            fileWidget.value = fileWidget.options.values[0];
-                        } else {
-                            fileWidget.value = "";
-                        }
-                        
                     } catch (error) {
-
+                        if (serial === searchSerial) {
+                            showSearchInfo(`Content search failed: ${error.message}`);
+                        }
+                        return;
+                    }
+                    // A newer search, a folder change or clearing the search wins
+                    if (serial !== searchSerial) {
+                        return;
+                    }
+                    
+                    const files = data.results.map(hit => hit.file);
+                    fileWidget.options = fileWidget.options || {};
+                    fileWidget.options.values = files;
+                    if (!(keepValue && files.includes(fileWidget.value))) {
+                        fileWidget.value = files.length > 0 ? files[0] : "";
+                    }
+                    
+                    const count = files.length >= SEARCH_RESULT_LIMIT ? `${files.length}+` : `${files.length}`;
+                    const status = `${count} files contain "${query}"` + (data.indexing ? " (still indexing)" : "");
+                    const snippets = data.results.slice(0, 3).map(hit => `${hit.file}: ${formatSnippet(hit.snippet)}`);
+                    showSearchInfo([status, ...snippets].join("\n"));
+                    app.graph.setDirtyCanvas(true);
+                };
+                
+                const searchWidget = this.addWidget("text", "search_contents", "", (value) => {
+                    searchQuery = (value || "").trim();
+                    if (!searchQuery) {
+                        searchSerial++;
+                        showSearchInfo(infoDefault);
+                    }
+                    this.applyTextToolsFileList(!searchQuery);
+                }, { serialize: false });
+                searchWidget.serialize = false;
+                
+                // File list update function
+                const updateFileList = async (folder, keepValue) => {
+                    if (currentFolder !== null) {
+                        folderLists.get(currentFolder)?.nodes.delete(this);
+                    }
+                    currentFolder = folder;
+                    
+                    const entry = getFolderList(folder);
+                    entry.nodes.add(this);
+                    await entry.ready;
+                    
+                    // The folder may have changed again while waiting
+                    if (currentFolder === folder) {
+                        this.applyTextToolsFileList(keepValue);
                     }
                 };
                 
                 // Initial setup
-                setTimeout(() => updateFileList(folderWidget.value), 100);
+                setTimeout(() => updateFileList(folderWidget.value, true), 100);
                 
                 // Folder change callback
                 const origFolderCallback = folderWidget.callback;
                 folderWidget.callback = function(value) {
-                    updateFileList(value);
+                    updateFileList(value, false);
                     if (origFolderCallback) {
                         return origFolderCallback.apply(this, arguments);
                     }
                 };
                 
+                // Stop receiving list updates once the node is gone
+                const onRemoved = this.onRemoved;
+                this.onRemoved = function() {
+                    folderLists.get(currentFolder)?.nodes.delete(this);
+                    if (onRemoved) {
+                        return onRemoved.apply(this, arguments);
+                    }
+                };
+                
                 // Set the node's initial size
                 const nodeWidth = 450;
                 const nodeHeight = 120;
-                this.setSize([nodeWidth, nodeHeight]);
+                // Grow past the default height so the read mode widgets fit
+                this.setSize([nodeWidth, Math.max(nodeHeight, this.computeSize()[1])]);
                 
                 // Store the original onResize
                 const originalOnResize = this.onResize;
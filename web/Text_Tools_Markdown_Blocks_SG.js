@@ -0,0 +1,170 @@
+// Block-level cached markdown rendering for the Viewer / Editor preview.
+// The source is split into top-level blocks with markdown-it's block parser; each
+// block's HTML is cached by its source and lives in its own wrapper <div>, so an
+// edit only re-renders and replaces the blocks that changed.
+
+// Rendered blocks kept across renders (per node)
+const CACHE_BLOCKS = 4000;
+// Longer documents only render the blocks near the visible part of the preview
+const LAZY_MIN_CHARS = 200 * 1024;
+// Estimated height of a not yet rendered block, per source line
+const PLACEHOLDER_LINE_EM = 1.6;
+
+/**
+ * Split markdown source into top-level blocks: [{ source, lines }], in document
+ * order. Also returns the reference definitions ([label]: url), which links in
+ * any block may use.
+ */
+export function splitMarkdownBlocks(md, source) {
+    const src = source.replace(/\r\n?/g, "\n");
+    const env = {};
+    const tokens = [];
+    md.block.parse(src, md, env, tokens);
+
+    const lineStarts = [0];
+    for (let i = src.indexOf("\n"); i !== -1; i = src.indexOf("\n", i + 1)) lineStarts.push(i + 1);
+    const offsetOfLine = (line) => (line < lineStarts.length ? lineStarts[line] : src.length);
+
+    const blocks = [];
+    for (const token of tokens) {
+        if (token.level !== 0 || token.nesting === -1 || !token.map) continue;
+        const [startLine, endLine] = token.map;
+        blocks.push({ source: src.slice(offsetOfLine(startLine), offsetOfLine(endLine)), lines: endLine - startLine });
+    }
+    return { blocks, references: env.references || {} };
+}
+
+export class BlockMarkdownRenderer {
+    constructor(md, container) {
+        this.md = md;
+        this.container = container;
+        this.cache = new Map();
+        this.referencesKey = "";
+        this.references = {};
+        this.observer = null;
+    }
+
+    _html(source) {
+        let html = this.cache.get(source);
+        if (html === undefined) {
+            // A copy, rendering must not add this block's definitions to the shared ones
+            html = this.md.render(source, { references: { ...this.references } });
+            if (this.cache.size >= CACHE_BLOCKS) this.cache.delete(this.cache.keys().next().value);
+        } else {
+            this.cache.delete(source);
+        }
+        this.cache.set(source, html);
+        return html;
+    }
+
+    _fill(el) {
+        el.innerHTML = this._html(el._mdSource);
+        el.style.minHeight = "";
+        el._mdFilled = true;
+    }
+
+    _placeholder(el) {
+        el.textContent = "";
+        el.style.minHeight = `${el._mdLines * PLACEHOLDER_LINE_EM}em`;
+        el._mdFilled = false;
+        this._observe(el);
+    }
+
+    _observe(el) {
+        if (!this.observer) {
+            // Blocks are rendered as they come within one screen of the visible area
+            this.observer = new IntersectionObserver((entries) => {
+                for (const entry of entries) {
+                    if (!entry.isIntersecting) continue;
+                    this.observer.unobserve(entry.target);
+                    if (!entry.target._mdFilled && entry.target.parentNode === this.container) this._fill(entry.target);
+                }
+            }, { root: this.container, rootMargin: "100% 0px" });
+        }
+        this.observer.observe(el);
+    }
+
+    /**
+     * Render source into the container, reusing the DOM of unchanged blocks.
+     * allBlocks renders every block even in a long document (e.g. so a text
+     * search can mark every match).
+     */
+    render(source, { allBlocks = false } = {}) {
+        const { blocks, references } = splitMarkdownBlocks(this.md, source);
+        const referencesKey = JSON.stringify(references);
+        const referencesChanged = referencesKey !== this.referencesKey;
+        if (referencesChanged) {
+            // Reference links can appear in any block, so every block renders again
+            this.referencesKey = referencesKey;
+            this.references = references;
+            this.cache.clear();
+        }
+        const lazy = !allBlocks && source.length >= LAZY_MIN_CHARS;
+
+        // Blocks with search marks from the last render get their clean HTML back
+        const marked = new Set();
+        for (const mark of this.container.querySelectorAll("mark[data-match-index]")) {
+            const el = mark.closest("[data-md-block]");
+            if (el) marked.add(el);
+        }
+
+        // Unchanged blocks keep their element, matched by source (duplicates in order)
+        const reusable = new Map();
+        for (const el of this.container.children) {
+            if (el._mdSource === undefined) continue;
+            const list = reusable.get(el._mdSource);
+            if (list) list.push(el);
+            else reusable.set(el._mdSource, [el]);
+        }
+
+        const elements = blocks.map(({ source: blockSource, lines }) => {
+            const el = reusable.get(blockSource)?.shift();
+            if (el) {
+                const stale = el._mdFilled && (referencesChanged || marked.has(el));
+                if (stale || (!el._mdFilled && !lazy)) this._fill(el);
+                return el;
+            }
+            const created = document.createElement("div");
+            created.dataset.mdBlock = "";
+            created._mdSource = blockSource;
+            created._mdLines = Math.max(1, lines);
+            if (lazy) this._placeholder(created);
+            else this._fill(created);
+            return created;
+        });
+
+        // Put the elements in order, touching only what moved, and drop the rest
+        const keep = new Set(elements);
+        const removeUntilKept = (node) => {
+            while (node && !keep.has(node)) {
+                const next = node.nextSibling;
+                if (this.observer && node.nodeType === 1) this.observer.unobserve(node);
+                this.container.removeChild(node);
+                node = next;
+            }
+            return node;
+        };
+        let cursor = removeUntilKept(this.container.firstChild);
+        for (const el of elements) {
+            if (el === cursor) {
+                cursor = removeUntilKept(cursor.nextSibling);
+            } else {
+                this.container.insertBefore(el, cursor);
+            }
+        }
+
+        if (lazy) {
+            // Blocks on screen now are filled right away (no blank frame while editing them)
+            const top = this.container.scrollTop - this.container.clientHeight;
+            const bottom = this.container.scrollTop + 2 * this.container.clientHeight;
+            const visible = elements.filter((el) => !el._mdFilled && el.offsetTop < bottom && el.offsetTop + el.offsetHeight > top);
+            visible.forEach((el) => this._fill(el));
+        }
+    }
+
+    reset() {
+        if (this.observer) this.observer.disconnect();
+        this.observer = null;
+        this.container.replaceChildren();
+    }
+}
@@ -0,0 +1,62 @@
+import { app } from "../../scripts/app.js";
+
+// Text inputs from this number on can be hidden by input_count (1 and 2 are always shown)
+const FIRST_OPTIONAL_INPUT = 3;
+
+function setWidgetVisible(widget, visible) {
+    if (!widget) return;
+    if (widget.origComputeSize === undefined) {
+        widget.origComputeSize = widget.computeSize || null;
+    }
+    widget.hidden = !visible;
+    // Older frontends ignore `hidden`, collapse the widget instead
+    widget.computeSize = visible ? (widget.origComputeSize || undefined) : () => [0, -4];
+    if (widget.inputEl) {
+        widget.inputEl.style.display = visible ? "" : "none";
+    }
+}
+
+app.registerExtension({
+    name: "TextToolsMergeTextMultiSG.InputCount",
+    async beforeRegisterNodeDef(nodeType, nodeData, app) {
+        if (nodeData.name === "Text Tools Merge Text Multi-SG") {
+            const onNodeCreated = nodeType.prototype.onNodeCreated;
+            nodeType.prototype.onNodeCreated = function() {
+                const result = onNodeCreated ? onNodeCreated.apply(this, arguments) : undefined;
+                
+                const countWidget = this.widgets?.find(w => w.name === "input_count");
+                if (!countWidget) return result;
+                
+                const updateVisibleInputs = () => {
+                    const count = countWidget.value;
+                    for (const widget of this.widgets) {
+                        const match = widget.name.match(/^(?:text|⬆️_enable)_(\d+)$/);
+                        if (match && Number(match[1]) >= FIRST_OPTIONAL_INPUT) {
+                            setWidgetVisible(widget, Number(match[1]) <= count);
+                        }
+                    }
+                    this.setSize([this.size[0], this.computeSize()[1]]);
+                    app.graph?.setDirtyCanvas(true, true);
+                };
+                
+                const originalCallback = countWidget.callback;
+                countWidget.callback = function() {
+                    const callbackResult = originalCallback ? originalCallback.apply(this, arguments) : undefined;
+                    updateVisibleInputs();
+                    return callbackResult;
+                };
+                
+                // Saved workflows set input_count after creation
+                const onConfigure = this.onConfigure;
+                this.onConfigure = function() {
+                    const configureResult = onConfigure ? onConfigure.apply(this, arguments) : undefined;
+                    updateVisibleInputs();
+                    return configureResult;
+                };
+                
+                updateVisibleInputs();
+                return result;
+            };
+        }
+    }
+});
@@ -0,0 +1,316 @@
+// Off-main-thread regex search for the Viewer / Editor highlight and line filter.
+// Queries run in a shared module Web Worker (Text_Tools_Search_Worker_SG.js);
+// results stream back in chunks, a newer query on the same channel supersedes the
+// running one, and a worker stuck in one regex is terminated and restarted.
+
+export const SEARCH_DEBOUNCE_MS = 150;
+// A query stops after this long and reports what it found so far
+export const SEARCH_BUDGET_MS = 5000;
+// Work between result chunks (and cancellation checks) in the worker
+const SEARCH_SLICE_MS = 30;
+// A worker that sends nothing for this long is stuck in a single regex call
+const WATCHDOG_MS = 2000;
+// Texts kept in the worker so repeated queries don't copy them again
+const WORKER_TEXT_SLOTS = 4;
+
+const now = () => performance.now();
+
+/**
+ * Search text in slices of about sliceMs, yielding { starts, ends, lines } chunks.
+ * mode "matches": every non-empty match of the pattern (offsets and line numbers).
+ * mode "lines": every line the pattern matches (line bounds and line numbers).
+ * Returns { truncated } once the text is done or the budget is used up.
+ */
+export function* searchChunks(text, mode, pattern, flags, budget = SEARCH_BUDGET_MS, sliceMs = SEARCH_SLICE_MS) {
+    const started = now();
+    let sliceEnd = started + sliceMs;
+    let starts = [];
+    let ends = [];
+    let lines = [];
+    const chunk = () => {
+        const result = { starts: Uint32Array.from(starts), ends: Uint32Array.from(ends), lines: Uint32Array.from(lines) };
+        starts = [];
+        ends = [];
+        lines = [];
+        return result;
+    };
+    // true when the current slice is over; the caller yields, then checks the budget
+    const sliceOver = () => {
+        if (now() < sliceEnd) return false;
+        sliceEnd = now() + sliceMs;
+        return true;
+    };
+
+    if (mode === "lines") {
+        const regex = new RegExp(pattern, flags.replace("g", ""));
+        let line = 0;
+        for (let lineStart = 0; lineStart <= text.length; line++) {
+            let lineEnd = text.indexOf("\n", lineStart);
+            if (lineEnd === -1) lineEnd = text.length;
+            if (regex.test(text.slice(lineStart, lineEnd))) {
+                starts.push(lineStart);
+                ends.push(lineEnd);
+                lines.push(line);
+            }
+            lineStart = lineEnd + 1;
+            if ((line & 1023) === 1023 && sliceOver()) {
+                yield chunk();
+                if (now() - started > budget) return { truncated: lineStart <= text.length };
+            }
+        }
+        yield chunk();
+        return { truncated: false };
+    }
+
+    const regex = new RegExp(pattern, flags.includes("g") ? flags : flags + "g");
+    let line = 0;
+    let nextNewline = text.indexOf("\n");
+    let match;
+    let steps = 0;
+    while ((match = regex.exec(text)) !== null) {
+        if (match[0].length === 0) {
+            regex.lastIndex++;
+        } else {
+            while (nextNewline !== -1 && nextNewline < match.index) {
+                line++;
+                nextNewline = text.indexOf("\n", nextNewline + 1);
+            }
+            starts.push(match.index);
+            ends.push(match.index + match[0].length);
+            lines.push(line);
+        }
+        if ((++steps & 255) === 0 && sliceOver()) {
+            yield chunk();
+            if (now() - started > budget) return { truncated: true };
+        }
+    }
+    yield chunk();
+    return { truncated: false };
+}
+
+// Join the lines of a "lines" search result, like lines.filter(...).join("\n")
+export function joinLines(text, result) {
+    const parts = new Array(result.count);
+    for (let i = 0; i < result.count; i++) parts[i] = text.slice(result.starts[i], result.ends[i]);
+    return parts.join("\n");
+}
+
+// Growing typed arrays for the chunks of one query
+class ResultBuffer {
+    constructor() {
+        this.starts = new Uint32Array(1024);
+        this.ends = new Uint32Array(1024);
+        this.lines = new Uint32Array(1024);
+        this.count = 0;
+    }
+
+    add(chunk) {
+        const needed = this.count + chunk.starts.length;
+        if (needed > this.starts.length) {
+            let size = this.starts.length;
+            while (size < needed) size *= 2;
+            for (const key of ["starts", "ends", "lines"]) {
+                const grown = new Uint32Array(size);
+                grown.set(this[key].subarray(0, this.count));
+                this[key] = grown;
+            }
+        }
+        this.starts.set(chunk.starts, this.count);
+        this.ends.set(chunk.ends, this.count);
+        this.lines.set(chunk.lines, this.count);
+        this.count = needed;
+    }
+
+    view(complete, truncated = false) {
+        return {
+            starts: this.starts.subarray(0, this.count),
+            ends: this.ends.subarray(0, this.count),
+            lines: this.lines.subarray(0, this.count),
+            count: this.count,
+            complete,
+            truncated,
+        };
+    }
+}
+
+// One worker shared by every node; texts are sent once and referenced by id afterwards
+class SearchWorker {
+    constructor() {
+        this.worker = null;
+        this.failed = false;
+        this.queries = new Map();
+        this.texts = [];
+        this.nextTextId = 1;
+    }
+
+    _ensure() {
+        if (this.worker || this.failed) return this.worker;
+        try {
+            this.worker = new Worker(new URL("./Text_Tools_Search_Worker_SG.js", import.meta.url), { type: "module" });
+            this.worker.onmessage = (e) => this._onMessage(e.data);
+            this.worker.onerror = (e) => {
+                e.preventDefault?.();
+                this._restart(`Search worker error: ${e.message || "unknown"}`);
+            };
+        } catch (e) {
+            console.warn("[TextTools] Search worker unavailable, searching on the main thread:", e);
+            this.failed = true;
+        }
+        return this.worker;
+    }
+
+    // Most recently used first; the worker drops whatever falls off the end
+    _textId(text) {
+        let index = this.texts.findIndex((entry) => entry.text.length === text.length && entry.text === text);
+        let entry;
+        if (index === -1) {
+            entry = { id: this.nextTextId++, text };
+            this.worker.postMessage({ type: "text", textId: entry.id, text });
+            if (this.texts.length >= WORKER_TEXT_SLOTS) {
+                this.worker.postMessage({ type: "drop", textId: this.texts.pop().id });
+            }
+        } else {
+            entry = this.texts.splice(index, 1)[0];
+        }
+        this.texts.unshift(entry);
+        return entry.id;
+    }
+
+    start(query) {
+        if (!this._ensure()) {
+            this._runInline(query);
+            return;
+        }
+        this.queries.set(query.id, query);
+        this.worker.postMessage({
+            type: "search",
+            id: query.id,
+            textId: this._textId(query.text),
+            mode: query.mode,
+            pattern: query.pattern,
+            flags: query.flags,
+            budget: query.budget,
+            sliceMs: SEARCH_SLICE_MS,
+        });
+        this._arm(query);
+    }
+
+    cancel(query) {
+        clearTimeout(query.watchdog);
+        if (this.queries.delete(query.id) && this.worker) {
+            this.worker.postMessage({ type: "cancel", id: query.id });
+        }
+    }
+
+    _arm(query) {
+        clearTimeout(query.watchdog);
+        query.watchdog = setTimeout(() => {
+            this._restart(`Search stopped: no progress for ${WATCHDOG_MS / 1000}s (the pattern may backtrack catastrophically)`);
+        }, WATCHDOG_MS);
+    }
+
+    // Terminating is the only way to stop a regex call that never returns
+    _restart(reason) {
+        if (this.worker) this.worker.terminate();
+        this.worker = null;
+        this.texts = [];
+        const queries = [...this.queries.values()];
+        this.queries.clear();
+        for (const query of queries) {
+            clearTimeout(query.watchdog);
+            query.finish({ error: reason });
+        }
+    }
+
+    _onMessage(data) {
+        const query = this.queries.get(data.id);
+        if (!query) return;
+        if (data.type === "chunk") {
+            this._arm(query);
+            query.result.add(data);
+            query.progress(query.result.view(false));
+            return;
+        }
+        clearTimeout(query.watchdog);
+        this.queries.delete(query.id);
+        if (data.type === "done") {
+            query.finish(query.result.view(true, data.truncated));
+        } else {
+            query.finish({ error: data.message });
+        }
+    }
+
+    _runInline(query) {
+        try {
+            const steps = searchChunks(query.text, query.mode, query.pattern, query.flags, query.budget);
+            let step;
+            while (!(step = steps.next()).done) query.result.add(step.value);
+            query.finish(query.result.view(true, step.value.truncated));
+        } catch (e) {
+            query.finish({ error: e.message });
+        }
+    }
+}
+
+const searchWorker = new SearchWorker();
+let nextQueryId = 1;
+
+/**
+ * Per-node search front end. Each channel (e.g. "highlight", "lines") has at most
+ * one live query; starting another cancels it.
+ */
+export class TextSearcher {
+    constructor() {
+        this.channels = new Map();
+    }
+
+    /**
+     * Search text after delay ms. onChunk receives the growing partial result while
+     * the query runs. Resolves with the final { starts, ends, lines, count, complete,
+     * truncated }, with { error } if it failed, or with null if it was superseded.
+     */
+    search(channel, text, { mode = "matches", pattern, flags = "gi", delay = 0, budget = SEARCH_BUDGET_MS }, onChunk = null) {
+        this.cancel(channel);
+        return new Promise((resolve) => {
+            const query = {
+                id: nextQueryId++,
+                text,
+                mode,
+                pattern,
+                flags,
+                budget,
+                result: new ResultBuffer(),
+                timer: 0,
+                watchdog: 0,
+                progress: (partial) => {
+                    if (this.channels.get(channel) === query && onChunk) onChunk(partial);
+                },
+                finish: (result) => {
+                    if (this.channels.get(channel) !== query) return;
+                    this.channels.delete(channel);
+                    if (!result.error && onChunk) onChunk(result);
+                    resolve(result);
+                },
+                resolve,
+            };
+            this.channels.set(channel, query);
+            query.timer = setTimeout(() => {
+                query.timer = 0;
+                searchWorker.start(query);
+            }, delay);
+        });
+    }
+
+    cancel(channel) {
+        const query = this.channels.get(channel);
+        if (!query) return;
+        this.channels.delete(channel);
+        clearTimeout(query.timer);
+        searchWorker.cancel(query);
+        query.resolve(null);
+    }
+
+    cancelAll() {
+        for (const channel of [...this.channels.keys()]) this.cancel(channel);
+    }
+}
@@ -0,0 +1,51 @@
+// Web Worker side of TextSearcher (see Text_Tools_Search_SG.js).
+// ComfyUI also imports every script in web/ as an extension, so the handlers
+// are only installed when this actually runs as a worker.
+import { searchChunks } from "./Text_Tools_Search_SG.js";
+
+const texts = new Map();
+const running = new Set();
+const cancelled = new Set();
+
+const run = async (query) => {
+    const text = texts.get(query.textId);
+    running.add(query.id);
+    try {
+        if (text === undefined) throw new Error("Search text is no longer available");
+        const steps = searchChunks(text, query.mode, query.pattern, query.flags, query.budget, query.sliceMs);
+        let step;
+        while (!(step = steps.next()).done) {
+            const chunk = step.value;
+            self.postMessage({ type: "chunk", id: query.id, ...chunk },
+                [chunk.starts.buffer, chunk.ends.buffer, chunk.lines.buffer]);
+            // Let cancel messages (and newer queries) in between slices
+            await new Promise((resolve) => setTimeout(resolve, 0));
+            if (cancelled.has(query.id)) return;
+        }
+        self.postMessage({ type: "done", id: query.id, truncated: step.value.truncated });
+    } catch (e) {
+        self.postMessage({ type: "error", id: query.id, message: e.message });
+    } finally {
+        running.delete(query.id);
+        cancelled.delete(query.id);
+    }
+};
+
+if (typeof WorkerGlobalScope !== "undefined" && self instanceof WorkerGlobalScope) {
+    self.onmessage = ({ data }) => {
+        switch (data.type) {
+            case "text":
+                texts.set(data.textId, data.text);
+                break;
+            case "drop":
+                texts.delete(data.textId);
+                break;
+            case "cancel":
+                if (running.has(data.id)) cancelled.add(data.id);
+                break;
+            case "search":
+                run(data);
+                break;
+        }
+    };
+}
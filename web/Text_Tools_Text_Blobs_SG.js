@@ -0,0 +1,63 @@
+import { api } from "../../scripts/api.js";
+
+// Editor texts can be kept out of the workflow: the server stores them once by
+// content hash and the workflow / prompt only hold this reference
+export const BLOB_REF_PREFIX = "text_tools_blob:sha256:";
+// Shorter texts stay in the workflow, a reference wouldn't save anything
+export const BLOB_MIN_CHARS = 64 * 1024;
+const RECENT_BLOBS = 8;
+
+// Most recently used first: { text, ref, promise }
+const recent = [];
+
+const findRecent = (text) => {
+    const index = recent.findIndex((entry) => entry.text.length === text.length && entry.text === text);
+    if (index === -1) return null;
+    const entry = recent.splice(index, 1)[0];
+    recent.unshift(entry);
+    return entry;
+};
+
+const remember = (entry) => {
+    recent.unshift(entry);
+    if (recent.length > RECENT_BLOBS) recent.pop();
+};
+
+export const isBlobRef = (value) =>
+    typeof value === "string" && value.length === BLOB_REF_PREFIX.length + 64 && value.startsWith(BLOB_REF_PREFIX);
+
+// Reference of a text that is already stored, or null (synchronous, for workflow serialization)
+export const knownBlobRef = (text) => findRecent(text)?.ref ?? null;
+
+// Store text on the server (once per content) and resolve with its reference
+export function storeTextBlob(text) {
+    const known = findRecent(text);
+    if (known) return known.ref ? Promise.resolve(known.ref) : known.promise;
+
+    const entry = { text, ref: null, promise: null };
+    entry.promise = api.fetchApi("/text_tools/blobs", {
+        method: "POST",
+        headers: { "Content-Type": "text/plain; charset=utf-8" },
+        body: text,
+    }).then(async (response) => {
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok || !data.ref) throw new Error(data.error || `HTTP ${response.status}`);
+        entry.ref = data.ref;
+        return data.ref;
+    }).catch((e) => {
+        const index = recent.indexOf(entry);
+        if (index !== -1) recent.splice(index, 1);
+        throw e;
+    });
+    remember(entry);
+    return entry.promise;
+}
+
+// Fetch the text behind a reference
+export async function fetchTextBlob(ref) {
+    const response = await api.fetchApi(`/text_tools/blobs/${ref.slice(BLOB_REF_PREFIX.length)}`);
+    if (!response.ok) throw new Error(`Stored text not found (HTTP ${response.status})`);
+    const text = await response.text();
+    if (!findRecent(text)) remember({ text, ref, promise: null });
+    return text;
+}
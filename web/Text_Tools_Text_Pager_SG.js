@@ -0,0 +1,82 @@
+import { api } from "../../scripts/api.js";
+
+// Characters requested per page when scrolling through a stored text
+export const TEXT_PAGE_CHARS = 256 * 1024;
+
+// Pages in a text kept on the server (text_ref from a Viewer / Editor ui message).
+// ref.loaded is the server-side offset of the first character not fetched yet.
+export class TextPager {
+    constructor(ref) {
+        this.id = ref.id;
+        this.length = ref.length;
+        this.lines = ref.lines;
+        this.loaded = ref.loaded ?? 0;
+        this.missing = false;
+        this._pending = null;
+    }
+
+    get complete() {
+        return this.missing || this.loaded >= this.length;
+    }
+
+    toRef() {
+        return { id: this.id, length: this.length, lines: this.lines, loaded: this.loaded };
+    }
+
+    // Fetch the next page; resolves to the new text ("" when there is nothing left).
+    // While a page is in flight, other callers get "" once it arrives, so no page is appended twice.
+    loadNext(count = TEXT_PAGE_CHARS) {
+        if (this.complete) return Promise.resolve("");
+        if (this._pending) return this._pending.then(() => "");
+        this._pending = (async () => {
+            try {
+                const response = await api.fetchApi(
+                    `/text_tools/text/${this.id}?mode=chars&start=${this.loaded}&count=${count}`
+                );
+                if (!response.ok) {
+                    // Evicted or the server restarted, keep what we have
+                    this.missing = true;
+                    return "";
+                }
+                const page = await response.json();
+                this.loaded = page.end;
+                return page.text;
+            } catch (e) {
+                console.warn("[TextTools] Failed to load text page:", e);
+                return "";
+            } finally {
+                this._pending = null;
+            }
+        })();
+        return this._pending;
+    }
+
+    // Fetch everything that is left, calling onChunk for every page this call fetched.
+    // Resolves to true once the whole text has been loaded.
+    async loadAll(onChunk) {
+        while (!this.complete) {
+            if (this._pending) {
+                // A scroll is loading the next page and appends it itself
+                await this._pending;
+                continue;
+            }
+            const chunk = await this.loadNext(4 * TEXT_PAGE_CHARS);
+            if (!chunk) break;
+            onChunk(chunk);
+        }
+        return this.loaded >= this.length;
+    }
+}
+
+// Load the next page whenever el is scrolled close to its end
+export function attachScrollPaging(el, getPager, onChunk) {
+    el.addEventListener("scroll", () => {
+        const pager = getPager();
+        if (!pager || pager.complete) return;
+        if (el.scrollTop + el.clientHeight >= el.scrollHeight - 2 * el.clientHeight) {
+            pager.loadNext().then((chunk) => {
+                if (chunk && getPager() === pager) onChunk(chunk);
+            });
+        }
+    });
+}
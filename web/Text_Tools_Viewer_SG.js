@@ -1,4 +1,8 @@
 import { app } from "../../scripts/app.js";
+import { TextPager, attachScrollPaging } from "./Text_Tools_Text_Pager_SG.js";
+import { WindowedHighlighter } from "./Text_Tools_Highlight_SG.js";
+import { TextSearcher, SEARCH_DEBOUNCE_MS, joinLines } from "./Text_Tools_Search_SG.js";
+import { BlockMarkdownRenderer } from "./Text_Tools_Markdown_Blocks_SG.js";
 
 const loadMarkdownIt = () => {
     return new Promise((resolve, reject) => {
@@ -626,7 +630,8 @@ app.registerExtension({
                     this._renderMarkdownWithHighlight();
                 }
                 
-                if (this._tv_highlight_div) this._tv_highlight_div.innerHTML = '';
+                if (this._tv_searcher) this._tv_searcher.cancelAll();
+                if (this._tv_highlighter) this._tv_highlighter.clear();
                 
                 this._tv_match_positions = [];
                 if (this._tv_match_counter) this._tv_match_counter.textContent = "0 / 0";
@@ -1005,17 +1010,34 @@ app.registerExtension({
             filterControls.appendChild(lineMatchCounter);
             textareaWrapper.appendChild(filterControls);
 
+            // Only the blocks around the visible part of the text carry <mark>s
+            const highlighter = new WindowedHighlighter(highlightDiv);
+            let highlightFrame = 0;
+            // Highlight search and line filter run in a worker, off the UI thread
+            const searcher = new TextSearcher();
+
             // Sync scroll between textarea and highlight div
             box.addEventListener('scroll', () => {
                 highlightDiv.scrollTop = box.scrollTop;
                 highlightDiv.scrollLeft = box.scrollLeft;
+                if (highlightFrame || !highlighter.matches) return;
+                highlightFrame = requestAnimationFrame(() => {
+                    highlightFrame = 0;
+                    highlighter.render(box.scrollTop, box.clientHeight);
+                });
             });
 
+            // Large texts arrive as a preview; fetch the rest as the user scrolls towards the end
+            attachScrollPaging(box, () => this._tv_pager, (chunk) => this._tv_append(chunk));
+            attachScrollPaging(markdownDiv, () => this._tv_pager, (chunk) => this._tv_append(chunk));
+
             // Store references
             this._tv_box = box;
             this._tv_counter = counter;
             this._tv_filter_input = filterInput;
             this._tv_highlight_div = highlightDiv;
+            this._tv_highlighter = highlighter;
+            this._tv_searcher = searcher;
             this._tv_highlight_controls = highlightControls;
             this._tv_match_counter = matchCounter;
             this._tv_match_positions = [];
@@ -1023,6 +1045,9 @@ app.registerExtension({
             this._tv_auto_resize = false;
             this._tv_original_text = "";
             this._tv_pretty_json_text = "";
+            this._tv_pager = null;
+            this._tv_version = null;
+            this._tv_updates = Promise.resolve();
             this._tv_markdown_div = markdownDiv;
             this._tv_line_filter_input = lineFilterInput;
             this._tv_filter_controls = filterControls;
@@ -1072,18 +1097,14 @@ app.registerExtension({
             const navigateToMatch = (index) => {
                 if (this._tv_match_positions.length === 0) return;
 
+                // Reuses the match positions found by _applyFilter, only the current mark changes
                 this._tv_current_match_index = index;
-                const pos = this._tv_match_positions[index];
-                const textBeforeMatch = box.value.substring(0, pos);
-                const lineNumber = textBeforeMatch.split('\n').length - 1;
-                const lineHeight = parseFloat(getComputedStyle(box).lineHeight);
-                const scrollPosition = lineNumber * lineHeight;
-
-                box.scrollTop = scrollPosition - (box.clientHeight / 2);
+                highlighter.setCurrent(index);
+                box.scrollTop = highlighter.matchTop(index) - (box.clientHeight / 2);
                 highlightDiv.scrollTop = box.scrollTop;
+                highlightDiv.scrollLeft = box.scrollLeft;
+                highlighter.render(box.scrollTop, box.clientHeight);
                 matchCounter.textContent = `${index + 1} / ${this._tv_match_positions.length}`;
-
-                this._applyFilter(index);
             };
 
             this._navigateToMarkdownMatch = (index) => {
@@ -1204,10 +1225,11 @@ app.registerExtension({
                 if (this.properties.markdown_mode) {
                     this._renderMarkdownWithHighlight();
                 } else {
-                    this._applyFilter();
-                    if (this._tv_match_positions.length > 0) {
-                        this._tv_navigate_to_match(0);
-                    }
+                    this._applyFilter(-1, SEARCH_DEBOUNCE_MS).then((done) => {
+                        if (done && this._tv_match_positions.length > 0) {
+                            this._tv_navigate_to_match(0);
+                        }
+                    });
                 }
             };
 
@@ -1216,15 +1238,19 @@ app.registerExtension({
                 if (this.properties.markdown_mode) {
                     this._renderMarkdownWithHighlight();
                 } else {
-                    this._applyLineFilter();
+                    this._applyLineFilter(SEARCH_DEBOUNCE_MS);
                 }
             };
 
             // Helper function to set text
-            this._tv_set = (v) => {
+            this._tv_set = (v, ref = null, version = null) => {
                 const text = typeof v === "string" ? v : (Array.isArray(v) ? v.join("\n") : "");
                 this._tv_original_text = text;
                 this.properties.text = text;
+                // ref: the full text is kept on the server and v is only its start
+                this._tv_pager = ref ? new TextPager(ref) : null;
+                // version: server tag of this text, the base for the next text_delta
+                this._tv_version = version;
                 this._tv_pretty_json_text = "";
                 this.properties.pretty_json_text = "";
                 this.properties.pretty_json_mode = false;
@@ -1242,6 +1268,77 @@ app.registerExtension({
                 this._updateCounter();
             };
 
+            // Apply a text_delta (one splice of the current text) from the server
+            this._tv_apply_delta = async (delta) => {
+                // ComfyUI replays the last ui message of a cached node, we already show that version
+                if (this._tv_version === delta.version) return;
+                const pager = this._tv_pager;
+                if (this._tv_version !== delta.base || (pager && !pager.complete)) {
+                    // We don't hold the text the delta is based on, fetch the new text instead
+                    const fullPager = new TextPager({ id: delta.id, length: delta.length, lines: delta.lines, loaded: 0 });
+                    const first = await fullPager.loadNext();
+                    if (!first && delta.length > 0) {
+                        // Evicted from the server or unreachable, keep the text we have
+                        console.warn("[TextTools] Could not load the updated text, keeping the current one");
+                        return;
+                    }
+                    this._tv_set(first, fullPager.complete ? null : fullPager.toRef(), delta.version);
+                    return;
+                }
+
+                const text = this._tv_original_text;
+                const next = text.slice(0, delta.start) + delta.insert + text.slice(delta.start + delta.remove);
+                if (this.properties.pretty_json_mode) {
+                    this._tv_set(next, null, delta.version);
+                    return;
+                }
+
+                this._tv_original_text = next;
+                this.properties.text = next;
+                this._tv_version = delta.version;
+                if (this.properties.markdown_mode) {
+                    box.value = next;
+                    this._renderMarkdownWithHighlight();
+                } else if (this.properties.text_filter || this.properties.line_filter) {
+                    this._applyFilter();
+                    this._applyLineFilter();
+                } else {
+                    // Only the changed range of the textarea is replaced
+                    box.setRangeText(delta.insert, delta.start, delta.start + delta.remove, "preserve");
+                }
+                this._updateCounter();
+            };
+
+            // Append the next fetched page of a large text
+            this._tv_append = (chunk) => {
+                this._tv_original_text += chunk;
+                this.properties.text = this._tv_original_text;
+
+                if (this.properties.pretty_json_mode) {
+                    // The pretty JSON view only exists for the complete text
+                    this._updateCounter();
+                    return;
+                }
+
+                if (this.properties.markdown_mode) {
+                    const scrollTop = markdownDiv.scrollTop;
+                    box.value = this._tv_original_text;
+                    this._renderMarkdownWithHighlight();
+                    markdownDiv.scrollTop = scrollTop;
+                } else if (this.properties.text_filter || this.properties.line_filter) {
+                    const scrollTop = box.scrollTop;
+                    this._applyFilter();
+                    this._applyLineFilter();
+                    box.scrollTop = scrollTop;
+                    highlightDiv.scrollTop = scrollTop;
+                } else {
+                    const scrollTop = box.scrollTop;
+                    box.value += chunk;
+                    box.scrollTop = scrollTop;
+                }
+                this._updateCounter();
+            };
+
             // Highlight text in rendered markdown HTML
             this._highlightMarkdownText = (searchText) => {
                 if (!searchText || !this._tv_markdown_div) return;
@@ -1342,8 +1439,12 @@ app.registerExtension({
                 }
 
                 try {
-                    const html = this._md.render(textToRender);
-                    this._tv_markdown_div.innerHTML = html;
+                    // Only blocks whose source changed are rendered again and swapped in the DOM;
+                    // long documents render the visible blocks, unless every match has to be marked
+                    if (!this._tv_markdown_blocks) {
+                        this._tv_markdown_blocks = new BlockMarkdownRenderer(this._md, this._tv_markdown_div);
+                    }
+                    this._tv_markdown_blocks.render(textToRender, { allBlocks: Boolean(filterValue && this.properties.text_filter) });
 
                     if (filterValue && this.properties.text_filter) {
                         this._highlightMarkdownText(filterValue);
@@ -1353,6 +1454,7 @@ app.registerExtension({
                     }
                 } catch (e) {
                     console.error("Markdown render error:", e);
+                    if (this._tv_markdown_blocks) this._tv_markdown_blocks.reset();
                     this._tv_markdown_div.innerHTML = "Error rendering markdown";
                 }
             };
@@ -1419,90 +1521,112 @@ app.registerExtension({
                 document.head.appendChild(themeStyle);
             };
 
-            // Apply text highlighting with navigation
-            this._applyFilter = (currentMatchIndex = -1) => {
+            // Apply text highlighting with navigation.
+            // The search runs in the worker; resolves true once all matches are shown.
+            this._applyFilter = (currentMatchIndex = -1, delay = 0) => {
                 const filterValue = filterInput.value;
 
                 if (!this.properties.line_filter) {
-                    box.value = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
+                    const sourceText = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
+                    if (box.value !== sourceText) box.value = sourceText;
                 }
 
                 this._updateCounter();
 
-                if (!filterValue || !this.properties.text_filter) {
-                    highlightDiv.innerHTML = '';
+                const clearHighlight = () => {
+                    searcher.cancel("highlight");
+                    highlighter.clear();
                     this._tv_match_positions = [];
                     matchCounter.textContent = "0 / 0";
-                    return;
+                    return false;
+                };
+
+                if (!filterValue || !this.properties.text_filter) {
+                    return Promise.resolve(clearHighlight());
                 }
 
                 try {
-                    const regex = new RegExp(filterValue, 'gi');
-                    const text = box.value;
-                    this._tv_match_positions = [];
-                    let match;
-
-                    while ((match = regex.exec(text)) !== null) {
-                        this._tv_match_positions.push(match.index);
-                    }
-
-                    if (currentMatchIndex === -1) {
-                        matchCounter.textContent = `0 / ${this._tv_match_positions.length}`;
-                    }
-
-                    let matchIndex = 0;
-                    const highlightedText = text.replace(new RegExp(filterValue, 'gi'), (match) => {
-                        const isCurrentMatch = matchIndex === currentMatchIndex;
-                        matchIndex++;
-                        if (isCurrentMatch) {
-                            return `<mark style="background-color: #ff6b6b; color: #000;">${match}</mark>`;
-                        } else {
-                            return `<mark style="background-color: #ffeb3b; color: #000;">${match}</mark>`;
-                        }
-                    });
+                    new RegExp(filterValue, 'gi');
+                } catch (e) {
+                    console.warn("Invalid regex pattern");
+                    return Promise.resolve(clearHighlight());
+                }
 
-                    highlightDiv.innerHTML = highlightedText;
+                const text = box.value;
+                let first = true;
+                // Partial results show up as they stream in; the positions drive the marks, Prev / Next and the counter
+                const showMatches = (result) => {
+                    this._tv_match_positions = result.starts;
                     highlightDiv.style.fontSize = box.style.fontSize;
+                    highlighter.setText(text);
+                    highlighter.setMatches(result, first ? currentMatchIndex : highlighter.current);
+                    first = false;
                     highlightDiv.scrollTop = box.scrollTop;
                     highlightDiv.scrollLeft = box.scrollLeft;
-                } catch (e) {
-                    console.warn("Invalid regex pattern");
-                    highlightDiv.innerHTML = '';
-                    this._tv_match_positions = [];
-                    matchCounter.textContent = "0 / 0";
-                }
+                    highlighter.render(box.scrollTop, box.clientHeight);
+                    const total = `${result.count}${result.truncated ? "+" : result.complete ? "" : "…"}`;
+                    matchCounter.textContent = `${highlighter.current === -1 ? 0 : highlighter.current + 1} / ${total}`;
+                };
+
+                return searcher.search("highlight", text, { mode: "matches", pattern: filterValue, flags: 'gi', delay }, showMatches)
+                    .then((result) => {
+                        if (!result) return false;
+                        if (result.error) {
+                            console.warn("[TextTools] Highlight search failed:", result.error);
+                            clearHighlight();
+                            matchCounter.textContent = "stopped";
+                            return false;
+                        }
+                        return true;
+                    });
             };
 
-            // Apply line filtering
-            this._applyLineFilter = () => {
+            // Apply line filtering (matching lines are found in the worker)
+            this._applyLineFilter = (delay = 0) => {
                 const filterValue = this._tv_line_filter_input.value;
+                const sourceText = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
 
-                if (!filterValue || !this.properties.line_filter) {
-                    box.value = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
+                const showAllLines = () => {
+                    searcher.cancel("lines");
+                    box.value = sourceText;
                     this._tv_line_match_counter.textContent = "0 lines";
                     this._updateCounter();
-                    return;
+                    return false;
+                };
+
+                if (!filterValue || !this.properties.line_filter) {
+                    return Promise.resolve(showAllLines());
                 }
 
                 try {
-                    const regex = new RegExp(filterValue, 'i');
-                    const sourceText = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
-                    const lines = sourceText.split('\n');
-                    const matchedLines = lines.filter(line => regex.test(line));
-
-                    box.value = matchedLines.join('\n');
-                    this._tv_line_match_counter.textContent = `${matchedLines.length} lines`;
-                    this._updateCounter();
-
-                    if (this.properties.text_filter) {
-                        this._applyFilter();
-                    }
+                    new RegExp(filterValue, 'i');
                 } catch (e) {
                     console.warn("Invalid regex pattern");
-                    box.value = this.properties.pretty_json_mode ? this._tv_pretty_json_text : this._tv_original_text;
-                    this._tv_line_match_counter.textContent = "0 lines";
-                    this._updateCounter();
+                    return Promise.resolve(showAllLines());
                 }
+
+                const showCount = (result) => {
+                    const suffix = result.truncated ? "+" : result.complete ? "" : "…";
+                    this._tv_line_match_counter.textContent = `${result.count}${suffix} lines`;
+                };
+
+                return searcher.search("lines", sourceText, { mode: "lines", pattern: filterValue, flags: 'i', delay }, showCount)
+                    .then((result) => {
+                        if (!result) return false;
+                        if (result.error) {
+                            console.warn("[TextTools] Line filter failed:", result.error);
+                            showAllLines();
+                            this._tv_line_match_counter.textContent = "stopped";
+                            return false;
+                        }
+                        box.value = joinLines(sourceText, result);
+                        this._updateCounter();
+
+                        if (this.properties.text_filter) {
+                            this._applyFilter();
+                        }
+                        return true;
+                    });
             };
 
             // Update counter
@@ -1512,12 +1636,18 @@ app.registerExtension({
                 const words = text.trim() ? text.trim().split(/\s+/).length : 0;
                 const lines = text ? text.split('\n').length : 0;
                 counter.textContent = `${chars} chars | ${words} words | ${lines} lines`;
+                const pager = this._tv_pager;
+                if (pager && !pager.complete) {
+                    const loaded = Math.floor(100 * pager.loaded / pager.length);
+                    counter.textContent += ` | ${loaded}% of ${pager.length} chars, ${pager.lines} lines loaded`;
+                }
             };
 
             // Initial setup - restore saved text if available
             const savedText = this.properties?.text ?? "";
             if (savedText) {
                 this._tv_original_text = savedText;
+                this._tv_pager = this.properties.text_ref ? new TextPager(this.properties.text_ref) : null;
                 this._tv_pretty_json_text = this.properties?.pretty_json_text ?? "";
                 box.value = this.properties.pretty_json_mode ? this._tv_pretty_json_text : savedText;
                 this._updateCounter();
@@ -1649,6 +1779,8 @@ app.registerExtension({
             
             info.properties = info.properties || {};
             info.properties.text = this._tv_original_text || "";
+            // Lets a reloaded workflow keep paging in a large text while the server still has it
+            info.properties.text_ref = this._tv_pager && !this._tv_pager.complete ? this._tv_pager.toRef() : null;
             info.properties.pretty_json_text = this._tv_pretty_json_text || "";
             info.properties.theme = this.properties.theme;
             info.properties.word_wrap = this.properties.word_wrap;
@@ -1678,6 +1810,7 @@ app.registerExtension({
                 // Restore text content
                 if (info.properties.text) {
                     this._tv_original_text = info.properties.text;
+                    this._tv_pager = info.properties.text_ref ? new TextPager(info.properties.text_ref) : null;
                     this._tv_pretty_json_text = info.properties.pretty_json_text || "";
                     
                     if (this._tv_box) {
@@ -1745,14 +1878,21 @@ app.registerExtension({
         // Override onExecuted
         const origOnExecuted = nodeType.prototype.onExecuted;
         nodeType.prototype.onExecuted = function (msg) {
-            try {
+            // Updates are applied in arrival order, a delta may have to wait for a fetch
+            this._tv_updates = (this._tv_updates ?? Promise.resolve()).then(async () => {
                 const textData = msg?.text;
+                const version = msg?.text_version?.[0] ?? null;
+                // A replayed message of a cached node would reset the text to its preview
+                if (version && version === this._tv_version) return;
                 if (textData && Array.isArray(textData) && textData.length > 0) {
-                    this._tv_set?.(textData[0]);
+                    this._tv_set?.(textData[0], msg?.text_ref?.[0] ?? null, msg?.text_version?.[0] ?? null);
                 }
-            } catch (e) {
+                for (const delta of msg?.text_delta ?? []) {
+                    await this._tv_apply_delta?.(delta);
+                }
+            }).catch((e) => {
                 console.error("TextViewer onExecuted error:", e);
-            }
+            });
 
             try {
                 origOnExecuted?.apply(this, arguments);